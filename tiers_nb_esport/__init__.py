@@ -4,4 +4,4 @@ Gère les files solo 3v3 avec ELO, votes et rotation de maps.
 """
 
 __version__ = "1.0.0"
-__all__ = ["matchmaking", "database", "elo_system", "config"]
+__all__ = ["matchmaking", "database", "async_database", "elo_system", "config"]
@@ -0,0 +1,177 @@
+"""Couche asynchrone de la base de données pour le bot Discord.
+
+Chaque fonction de `database` a ici son équivalent awaitable. Les requêtes
+psycopg2 s'exécutent dans un pool de threads dédié, dimensionné sur le pool de
+connexions : la boucle asyncio (et donc le heartbeat de la gateway Discord) ne
+reste jamais bloquée par une requête lente. L'API synchrone de `database`
+reste la référence pour les scripts.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+from . import config, database
+from .database import Player
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # Un thread par connexion possible : au-delà, les threads attendraient
+    # de toute façon une connexion libre dans le pool psycopg2.
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, config.DB_POOL_MAX_CONN),
+            thread_name_prefix="db",
+        )
+    return _executor
+
+
+async def run_sync(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Exécute une fonction synchrone utilisant la base hors de la boucle asyncio."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def close() -> None:
+    """Arrête le pool de threads puis ferme les connexions."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+    database.close_pool()
+
+
+async def init_db() -> None:
+    await run_sync(database.init_db)
+
+
+async def ensure_player(
+    discord_id: int, name: Optional[str], division: Optional[str] = None
+) -> Player:
+    return await run_sync(database.ensure_player, discord_id, name, division)
+
+
+async def ensure_players(
+    entries: Iterable[Tuple[int, Optional[str]]], division: Optional[str] = None
+) -> Dict[int, Player]:
+    return await run_sync(database.ensure_players, list(entries), division)
+
+
+async def fetch_players(discord_ids: Iterable[int]) -> Dict[int, Player]:
+    # On matérialise l'itérable ici : un générateur ne doit pas être consommé
+    # depuis un autre thread.
+    return await run_sync(database.fetch_players, list(discord_ids))
+
+
+async def fetch_player(discord_id: int) -> Optional[Player]:
+    return await run_sync(database.fetch_player, discord_id)
+
+
+async def fetch_leaderboard(limit: int = 10) -> Tuple[List[Player], int]:
+    return await run_sync(database.fetch_leaderboard, limit)
+
+
+async def fetch_leaderboard_page(limit: int = 10, offset: int = 0) -> Tuple[List[Player], int]:
+    return await run_sync(database.fetch_leaderboard_page, limit, offset)
+
+
+async def fetch_leaderboard_keyset(
+    limit: int = 10,
+    after: Optional[database.LeaderboardKey] = None,
+    before: Optional[database.LeaderboardKey] = None,
+) -> database.LeaderboardPage:
+    return await run_sync(database.fetch_leaderboard_keyset, limit, after, before)
+
+
+async def count_players() -> int:
+    return await run_sync(database.count_players)
+
+
+async def record_match(
+    team1_ids: List[int], team2_ids: List[int], map_info: Dict[str, str]
+) -> Dict:
+    return await run_sync(database.record_match, list(team1_ids), list(team2_ids), dict(map_info))
+
+
+async def load_match(match_id: int) -> Optional[Dict]:
+    return await run_sync(database.load_match, match_id)
+
+
+async def record_game_result(match_id: int, winner_label: str) -> Optional[Dict]:
+    return await run_sync(database.record_game_result, match_id, winner_label)
+
+
+async def set_match_message(match_id: int, channel_id: int, message_id: int) -> None:
+    await run_sync(database.set_match_message, match_id, channel_id, message_id)
+
+
+async def load_vote_state(match_id: int) -> Optional[Tuple[Dict, List[Tuple[int, str]]]]:
+    return await run_sync(database.load_vote_state, match_id)
+
+
+async def record_vote(match_id: int, discord_id: int, label: str) -> bool:
+    return await run_sync(database.record_vote, match_id, discord_id, label)
+
+
+async def close_vote_round(match_id: int, winner_label: str) -> Optional[Dict]:
+    return await run_sync(database.close_vote_round, match_id, winner_label)
+
+
+async def update_match_series_score(
+    match_id: int, team1_score: int, team2_score: int
+) -> Optional[Dict]:
+    return await run_sync(database.update_match_series_score, match_id, team1_score, team2_score)
+
+
+async def complete_match(match_id: int, winner_label: str) -> Optional[Dict]:
+    return await run_sync(database.complete_match, match_id, winner_label)
+
+
+async def cancel_match(match_id: int) -> Optional[Dict]:
+    return await run_sync(database.cancel_match, match_id)
+
+
+async def expire_matches(match_ids: Iterable[int]) -> List[Dict]:
+    return await run_sync(database.expire_matches, list(match_ids))
+
+
+async def fetch_pending_created_at() -> List[Tuple[int, datetime]]:
+    return await run_sync(database.fetch_pending_created_at)
+
+
+async def load_pending_index() -> int:
+    return await run_sync(database.load_pending_index)
+
+
+async def load_leaderboard() -> int:
+    return await run_sync(database.load_leaderboard)
+
+
+async def load_rank_snapshot() -> int:
+    return await run_sync(database.load_rank_snapshot)
+
+
+async def flush_rank_rows() -> int:
+    return await run_sync(database.flush_rank_rows)
+
+
+async def fetch_player_history(
+    discord_id: int, limit: int = 10, after: Optional[database.HistoryKey] = None
+) -> database.HistoryPage:
+    return await run_sync(database.fetch_player_history, discord_id, limit, after)
+
+
+async def player_has_pending_match(discord_id: int) -> bool:
+    return await run_sync(database.player_has_pending_match, discord_id)
+
+
+async def apply_player_updates(updates: Iterable[Dict[str, int]]) -> None:
+    await run_sync(database.apply_player_updates, list(updates))
@@ -0,0 +1,242 @@
+"""Benchmarks du matchmaking.
+
+Usage : python -m tiers_nb_esport.bench <scénario> [options]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from typing import Callable, List, Sequence, Tuple
+
+from . import config, elo_batch, matchmaker, team_balance
+from .elo_queue import EloQueue, QueueEntry
+
+
+def _random_lobby(rng: random.Random, size: int) -> List[int]:
+    return [max(0, int(rng.gauss(1200, 250))) for _ in range(size)]
+
+
+def _timed(func: Callable[[], object], repeat: int) -> float:
+    """Latence moyenne d'un appel, en microsecondes."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def bench_balance(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    splitters: List[Tuple[str, Callable[[Sequence[float]], Tuple[List[int], List[int]]]]] = [
+        ("alternance", team_balance.snake_split),
+        ("moteur", lambda r: team_balance.split_teams(r, args.objective)),
+    ]
+    print(f"Objectif : {args.objective} — {args.lobbies} lobbies par taille")
+    print(f"{'taille':>6} {'méthode':>11} {'µs/appel':>9} {'écart moy.':>10} {'p95':>7} {'max':>7}")
+    for size in args.sizes:
+        lobbies = [_random_lobby(rng, size) for _ in range(args.lobbies)]
+        for name, split in splitters:
+            gaps = []
+            for ratings in lobbies:
+                team1, team2 = split(ratings)
+                gaps.append(
+                    team_balance.average_gap([ratings[i] for i in team1], [ratings[i] for i in team2])
+                )
+            sample = lobbies[: min(len(lobbies), 200)]
+            latency = _timed(lambda: [split(r) for r in sample], 5) / len(sample)
+            gaps.sort()
+            p95 = gaps[int(len(gaps) * 0.95) - 1]
+            print(
+                f"{size:>6} {name:>11} {latency:>9.1f} {statistics.mean(gaps):>10.1f} "
+                f"{p95:>7.1f} {gaps[-1]:>7.1f}"
+            )
+
+
+def _random_pool(rng: random.Random, size: int, now: float) -> List[QueueEntry]:
+    return [
+        QueueEntry(discord_id=i, elo=elo, joined_at=now - rng.uniform(0, 600), seq=i)
+        for i, elo in enumerate(_random_lobby(rng, size))
+    ]
+
+
+def bench_matchmaker(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    now = time.monotonic()
+    print(f"Lobbies de {args.lobby_size} — écart max {args.max_spread}")
+    print(f"{'file':>6} {'méthode':>9} {'ms/passe':>9} {'lobbies':>8} {'écart moy.':>10}")
+    for size in args.pool_sizes:
+        pool = _random_pool(rng, size, now)
+        fifo = sorted(pool, key=lambda entry: entry.seq)
+        fifo_spreads = [
+            matchmaker.Lobby(tuple(fifo[i : i + args.lobby_size])).spread
+            for i in range(0, size - args.lobby_size + 1, args.lobby_size)
+        ]
+        fifo_spreads = [spread for spread in fifo_spreads if spread <= args.max_spread]
+        lobbies = matchmaker.form_lobbies(pool, args.lobby_size, args.max_spread, 300, now)
+        latency = _timed(
+            lambda: matchmaker.form_lobbies(pool, args.lobby_size, args.max_spread, 300, now), 20
+        ) / 1000
+        print(
+            f"{size:>6} {'FIFO':>9} {'-':>9} {len(fifo_spreads):>8} "
+            f"{statistics.mean(fifo_spreads) if fifo_spreads else 0:>10.1f}"
+        )
+        print(
+            f"{size:>6} {'groupée':>9} {latency:>9.2f} {len(lobbies):>8} "
+            f"{statistics.mean(l.spread for l in lobbies) if lobbies else 0:>10.1f}"
+        )
+
+
+def bench_wait(args: argparse.Namespace) -> None:
+    """Simule des arrivées de Poisson et mesure le temps avant match."""
+    curves = [
+        ("fixe", matchmaker.EloWindowCurve(args.base, 0, args.base)),
+        ("élargie", matchmaker.EloWindowCurve(args.base, args.growth, args.maximum)),
+    ]
+    print(
+        f"{args.arrivals_per_minute} arrivées/min pendant {args.minutes} min — "
+        f"passe toutes les {args.tick:.0f}s"
+    )
+    print(f"{'fenêtre':>8} {'servis':>7} {'restants':>8} {'médiane':>8} {'p95':>7}")
+    for name, curve in curves:
+        rng = random.Random(args.seed)
+        queue = EloQueue()
+        stats = matchmaker.WaitTimeStats(maxlen=1_000_000)
+        now = 0.0
+        next_arrival = rng.expovariate(args.arrivals_per_minute / 60)
+        player_id = 0
+        while now < args.minutes * 60:
+            now += args.tick
+            while next_arrival <= now:
+                # Population bimodale : beaucoup de joueurs moyens, quelques extrêmes.
+                elo = rng.gauss(1100, 150) if rng.random() < 0.8 else rng.gauss(1800, 300)
+                queue.add(player_id, max(0, int(elo)), joined_at=next_arrival)
+                player_id += 1
+                next_arrival += rng.expovariate(args.arrivals_per_minute / 60)
+            lobbies = matchmaker.form_lobbies(
+                queue.entries(), 6, fairness_wait=300, now=now, window=curve
+            )
+            for lobby in lobbies:
+                for entry in queue.pop_many(lobby.discord_ids):
+                    stats.record(entry.wait_time(now))
+        summary = stats.summary()
+        print(
+            f"{name:>8} {summary['count']:>7} {len(queue):>8} "
+            f"{summary['median']:>7.0f}s {summary['p95']:>6.0f}s"
+        )
+
+
+def bench_elo(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    team_size = args.team_size
+    ratings = _random_lobby(rng, args.matches * 2 * team_size)
+    match_index = [i // (2 * team_size) for i in range(len(ratings))]
+    teams = [(i // team_size) % 2 for i in range(len(ratings))]
+    winners = [rng.randint(0, 1) for _ in range(args.matches)]
+    paths = [("python", False)]
+    if elo_batch.np is not None:
+        paths.append(("numpy", True))
+    else:
+        print("numpy absent : seul le chemin Python est mesuré.")
+    print(f"{args.matches} matchs de {team_size}v{team_size} ({len(ratings)} mises à jour)")
+    for name, use_numpy in paths:
+        start = time.perf_counter()
+        elo_batch.compute_elo_batch(ratings, match_index, teams, winners, use_numpy=use_numpy)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>7} : {elapsed * 1000:8.1f} ms — {len(ratings) / elapsed / 1e6:6.2f} M maj/s")
+
+
+def bench_prepared(args: argparse.Namespace) -> None:
+    """Latence des requêtes chaudes, ad hoc puis préparées (lecture seule, DATABASE_URL)."""
+    from . import database, prepared
+
+    rng = random.Random(args.seed)
+    with database.get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT * FROM players WHERE name IS NOT NULL LIMIT 1000")
+            rows = cur.fetchall()
+            ids = [int(row["discord_id"]) for row in rows]
+            if not ids:
+                print("Table players vide : rien à mesurer.")
+                return
+            keys = [database.leaderboard_key(row) for row in rows]
+
+            def after_params() -> tuple:
+                _, params = database._keyset_condition(rng.choice(keys), after=True)
+                return params + (11,)
+
+            cases = [
+                ("fetch_player", "player_by_id", lambda: (rng.choice(ids),)),
+                ("fetch_players", "players_by_ids", lambda: (rng.sample(ids, min(6, len(ids))),)),
+                ("pending_match", "pending_match_for_player", lambda: (rng.choice(ids),)),
+                ("leaderboard_first", "leaderboard_first", lambda: (11,)),
+                ("leaderboard_after", "leaderboard_after", after_params),
+            ]
+            print(f"{len(ids)} joueurs échantillonnés — {args.repeat} appels par mesure")
+            print(f"{'requête':>17} {'ad hoc µs':>10} {'préparée µs':>12} {'gain':>6}")
+            enabled = config.DB_PREPARED_STATEMENTS
+            try:
+                for label, name, params in cases:
+                    statement = prepared.get(name)
+                    latencies = []
+                    for use_prepared in (False, True):
+                        config.DB_PREPARED_STATEMENTS = use_prepared
+
+                        def run() -> None:
+                            prepared.execute(cur, statement, params())
+                            cur.fetchall()
+
+                        _timed(run, min(50, args.repeat))
+                        latencies.append(_timed(run, args.repeat))
+                    print(
+                        f"{label:>17} {latencies[0]:>10.1f} {latencies[1]:>12.1f} "
+                        f"{latencies[0] / latencies[1]:>5.2f}x"
+                    )
+            finally:
+                config.DB_PREPARED_STATEMENTS = enabled
+    database.close_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m tiers_nb_esport.bench")
+    parser.add_argument("--seed", type=int, default=42)
+    subparsers = parser.add_subparsers(dest="scenario", required=True)
+
+    balance = subparsers.add_parser("balance", help="Équilibrage des équipes vs alternance")
+    balance.add_argument("--sizes", type=int, nargs="+", default=[6, 8, 10, 16])
+    balance.add_argument("--lobbies", type=int, default=2000)
+    balance.add_argument(
+        "--objective", choices=sorted(team_balance.OBJECTIVES), default="average"
+    )
+    balance.set_defaults(func=bench_balance)
+
+    pool = subparsers.add_parser("matchmaker", help="Passe groupée vs découpage FIFO")
+    pool.add_argument("--pool-sizes", type=int, nargs="+", default=[30, 100, 300, 1000])
+    pool.add_argument("--lobby-size", type=int, default=6)
+    pool.add_argument("--max-spread", type=int, default=200)
+    pool.set_defaults(func=bench_matchmaker)
+
+    wait = subparsers.add_parser("wait", help="Temps avant match : fenêtre fixe vs élargie")
+    wait.add_argument("--arrivals-per-minute", type=float, default=2.0)
+    wait.add_argument("--minutes", type=float, default=600)
+    wait.add_argument("--tick", type=float, default=5.0)
+    wait.add_argument("--base", type=float, default=200)
+    wait.add_argument("--growth", type=float, default=50)
+    wait.add_argument("--maximum", type=float, default=600)
+    wait.set_defaults(func=bench_wait)
+
+    elo = subparsers.add_parser("elo", help="Débit du calcul ELO par lots")
+    elo.add_argument("--matches", type=int, default=200_000)
+    elo.add_argument("--team-size", type=int, default=3)
+    elo.set_defaults(func=bench_elo)
+
+    statements = subparsers.add_parser("prepared", help="Requêtes chaudes : ad hoc vs préparées")
+    statements.add_argument("--repeat", type=int, default=2000)
+    statements.set_defaults(func=bench_prepared)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,10 +9,45 @@ MATCH_CHANNEL_ID = int(os.getenv("MATCH_CHANNEL_ID", "1434509931360419890"))
 LOG_CHANNEL_ID = int(os.getenv("LOG_CHANNEL_ID", "1237166689188053023"))
 PING_ROLE_ID = int(os.getenv("PING_ROLE_ID", "1437211411096010862"))
 
+# Base de données
+DB_POOL_MIN_CONN = int(os.getenv("DB_POOL_MIN_CONN", "2"))
+DB_POOL_MAX_CONN = int(os.getenv("DB_POOL_MAX_CONN", "10"))
+# Requêtes chaudes préparées par connexion (désactiver derrière un pooler en mode transaction)
+DB_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "true").lower() in ("1", "true", "yes")
+PLAYER_CACHE_SIZE = int(os.getenv("PLAYER_CACHE_SIZE", "5000"))
+PLAYER_CACHE_TTL = float(os.getenv("PLAYER_CACHE_TTL", "600"))  # secondes, 0 = sans expiration
+LEADERBOARD_COUNT_TTL = float(os.getenv("LEADERBOARD_COUNT_TTL", "300"))  # secondes
+LEADERBOARD_PAGE_CACHE_SIZE = int(os.getenv("LEADERBOARD_PAGE_CACHE_SIZE", "64"))  # pages rendues
+HISTORY_CACHE_PLAYERS = int(os.getenv("HISTORY_CACHE_PLAYERS", "500"))  # joueurs en cache (!history)
+VOTE_LOCK_STRIPES = int(os.getenv("VOTE_LOCK_STRIPES", "64"))  # verrous de vote partagés entre matchs
+MATCH_EXPIRY_MINUTES = float(os.getenv("MATCH_EXPIRY_MINUTES", "60"))  # match annulé sans majorité
+MATCH_EXPIRY_TICK = float(os.getenv("MATCH_EXPIRY_TICK", "5"))  # secondes, grille de réveil des expirations
+OUTBOUND_CHANNEL_RATE = float(os.getenv("OUTBOUND_CHANNEL_RATE", "1"))  # messages / seconde / salon
+OUTBOUND_CHANNEL_BURST = int(os.getenv("OUTBOUND_CHANNEL_BURST", "5"))
+OUTBOUND_EDIT_WINDOW = float(os.getenv("OUTBOUND_EDIT_WINDOW", "1"))  # secondes de fusion des éditions
+OUTBOUND_MAX_PENDING = int(os.getenv("OUTBOUND_MAX_PENDING", "50"))  # opérations cosmétiques / salon
+MATCH_PIPELINE_MAX_PENDING = int(os.getenv("MATCH_PIPELINE_MAX_PENDING", "8"))  # lobbies en création
+MATCH_PIPELINE_WORKERS = int(os.getenv("MATCH_PIPELINE_WORKERS", "2"))  # par étape réseau/base
+# "index" : index mémoire seul, "verify" : index contrôlé par la base, "db" : base seule
+PENDING_INDEX_MODE = os.getenv("PENDING_INDEX_MODE", "index").lower()
+
 # Matchmaking
 QUEUE_TARGET_SIZE = int(os.getenv("QUEUE_TARGET_SIZE", "6"))
 DEFAULT_DIVISION = os.getenv("MATCHMAKING_DEFAULT_DIVISION", "solo")
+# Écart ELO total accepté dans un lobby à l'entrée en file, élargi avec l'attente :
+# QUEUE_MAX_ELO_DIFF + GROWTH × (minutes ^ EXPONENT), plafonné à QUEUE_ELO_WINDOW_MAX
 QUEUE_MAX_ELO_DIFF = int(os.getenv("QUEUE_MAX_ELO_DIFF", "200"))
+QUEUE_ELO_WINDOW_GROWTH = float(os.getenv("QUEUE_ELO_WINDOW_GROWTH", "50"))
+QUEUE_ELO_WINDOW_EXPONENT = float(os.getenv("QUEUE_ELO_WINDOW_EXPONENT", "1"))
+QUEUE_ELO_WINDOW_MAX = float(os.getenv("QUEUE_ELO_WINDOW_MAX", "600"))
+# Estimation du débit d'arrivée (ETA de !queue)
+ARRIVAL_BAND_WIDTH = int(os.getenv("ARRIVAL_BAND_WIDTH", "100"))
+ARRIVAL_RATE_TIME_CONSTANT = float(os.getenv("ARRIVAL_RATE_TIME_CONSTANT", "1800"))
+# Passe de matchmaking groupée : fréquence et attente au-delà de laquelle un joueur est prioritaire
+MATCHMAKING_TICK_SECONDS = float(os.getenv("MATCHMAKING_TICK_SECONDS", "5"))
+MATCHMAKING_FAIRNESS_WAIT = float(os.getenv("MATCHMAKING_FAIRNESS_WAIT", "300"))
+# Objectif d'équilibrage des équipes : "average", "variance" ou "spread"
+BALANCE_OBJECTIVE = os.getenv("BALANCE_OBJECTIVE", "average")
 
 # ELO
 K_FACTOR = 30
@@ -29,6 +64,16 @@ RANKS = [
     {"name": "Diamant", "min_elo": 1900, "emoji": "💎"},
 ]
 
+# Files matchmaking : seuils ELO de début de chaque file.
+# QUEUE_BRACKETS="0,1500" (par défaut : 0 et QUEUE_OR_1_MIN_ELO) ou "ranks" pour une file par rang.
+_QUEUE_BRACKETS_RAW = os.getenv("QUEUE_BRACKETS", "").strip().lower()
+if _QUEUE_BRACKETS_RAW == "ranks":
+    QUEUE_BRACKET_MIN_ELOS: List[int] = sorted({int(rank["min_elo"]) for rank in RANKS})
+elif _QUEUE_BRACKETS_RAW:
+    QUEUE_BRACKET_MIN_ELOS = sorted({int(v) for v in _QUEUE_BRACKETS_RAW.split(",") if v.strip()})
+else:
+    QUEUE_BRACKET_MIN_ELOS = [0, QUEUE_OR_1_MIN_ELO]
+
 # Classement tiers (ratio basé sur le classement global)
 TIER_DISTRIBUTION = [
     {"tier": "S", "ratio": 0.005, "minCount": 1},
@@ -39,6 +84,21 @@ TIER_DISTRIBUTION = [
     {"tier": "E", "ratio": 0.555, "minCount": 1},
 ]
 
+# Rôles Discord par tier (synchronisation désactivée par défaut, cf. HOTFIX.md)
+TIER_ROLE_SYNC_ENABLED = os.getenv("TIER_ROLE_SYNC_ENABLED", "false").lower() in ("1", "true", "yes")
+TIER_ROLE_IDS: Dict[str, int] = {
+    "S": int(os.getenv("ROLE_TIER_S", "1482720508813512814")),
+    "A": int(os.getenv("ROLE_TIER_A", "1482720488529727498")),
+    "B": int(os.getenv("ROLE_TIER_B", "1482720438751723621")),
+    "C": int(os.getenv("ROLE_TIER_C", "1482720402428924047")),
+    "D": int(os.getenv("ROLE_TIER_D", "1482720374713094164")),
+    "E": int(os.getenv("ROLE_TIER_E", "1482720350004449302")),
+}
+TIER_ROLE_SYNC_RATE = float(os.getenv("TIER_ROLE_SYNC_RATE", "1"))  # modifications de membre / seconde
+TIER_ROLE_SYNC_MAX_PENDING = int(os.getenv("TIER_ROLE_SYNC_MAX_PENDING", "1000"))
+TIER_ROLE_RECONCILE_MINUTES = float(os.getenv("TIER_ROLE_RECONCILE_MINUTES", "60"))
+RANK_FLUSH_SECONDS = float(os.getenv("RANK_FLUSH_SECONDS", "15"))  # écriture groupée de player_ranks
+
 # Maps (copier MAP_ROTATION depuis main.py)
 MAP_ROTATION: List[Dict[str, Any]] = [
     {
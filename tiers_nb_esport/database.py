@@ -1,15 +1,26 @@
 """Gestion de la base de données PostgreSQL pour le matchmaking PrissLeague."""
 from __future__ import annotations
 
+import logging
+import threading
+import time
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 from contextlib import contextmanager
 
 import psycopg2
 import psycopg2.pool
 from psycopg2.extras import RealDictCursor, execute_values
 
-from . import config
+from . import config, prepared
+from .leaderboard import RankedLeaderboard
+from .match_history import HistoryCache, HistoryEntry, HistoryKey, HistoryPage
+from .pending_index import PendingMatchIndex
+from .player_cache import PlayerCache
+from .rank_snapshot import RankRow, RankSnapshot
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -33,6 +44,104 @@ class Player:
         )
 
 
+# Clé de tri du classement : (solo_elo, solo_wins, solo_losses, name, discord_id).
+# Sert de curseur à la pagination par clé (keyset).
+LeaderboardKey = Tuple[int, int, int, Optional[str], int]
+
+
+@dataclass
+class LeaderboardPage:
+    players: List[Player]
+    first_key: Optional[LeaderboardKey]
+    last_key: Optional[LeaderboardKey]
+    has_previous: bool
+    has_next: bool
+    total_players: int
+
+
+@dataclass
+class MatchFinalization:
+    match: Dict
+    # False si le match avait déjà été traité : `match` est alors l'état actuel.
+    finalized: bool
+
+
+# Calcule les mises à jour joueurs d'un match à partir des lignes verrouillées.
+SettleFn = Callable[[Dict, Dict[int, Player]], List[Dict[str, int]]]
+
+
+# ── PERF #6 : Cache joueurs write-through ────────────────────────────────────
+# Évite l'UPSERT et les SELECT répétés à chaque !join pour un joueur déjà connu.
+player_cache = PlayerCache(maxsize=config.PLAYER_CACHE_SIZE, ttl=config.PLAYER_CACHE_TTL)
+
+# ── PERF #7 : Index mémoire des matchs en attente ────────────────────────────
+# player_has_pending_match devient un simple lookup une fois l'index chargé.
+pending_index = PendingMatchIndex()
+
+# ── PERF #9 : Classement en mémoire ──────────────────────────────────────────
+# Rang d'un joueur et saut direct à sa page sans trier la table.
+leaderboard = RankedLeaderboard()
+# Derniers matchs par joueur (!history), invalidés à la fin de chacun de ses matchs.
+history_cache = HistoryCache(max_players=config.HISTORY_CACHE_PLAYERS)
+# Rang/tier par joueur, rafraîchis par tranches après chaque match.
+rank_snapshot = RankSnapshot(leaderboard)
+# Sérialise les mises à jour du classement mémoire et de l'instantané entre threads.
+_ranking_lock = threading.Lock()
+# Lignes player_ranks pas encore écrites (dernier état gagnant), vidées par `flush_rank_rows`.
+_pending_rank_rows: Dict[int, RankRow] = {}
+_pending_rank_lock = threading.Lock()
+_rank_flush_lock = threading.Lock()
+
+# Nombre total de joueurs pour le classement, sans COUNT(*) à chaque page.
+_player_count: Optional[int] = None
+_player_count_at = 0.0
+_player_count_lock = threading.Lock()
+
+# Version des ratings : incrémentée à chaque écriture qui peut modifier le
+# classement, elle invalide les pages rendues du cache `!lb`.
+_ratings_version = 0
+_ratings_version_lock = threading.Lock()
+
+
+# ── PERF #10 : Requêtes chaudes préparées ────────────────────────────────────
+# Parsées et planifiées une fois par connexion du pool, puis exécutées par nom.
+_PLAYER_BY_ID = prepared.register(
+    "player_by_id",
+    "SELECT * FROM players WHERE discord_id = %s",
+    "BIGINT",
+)
+_PLAYERS_BY_IDS = prepared.register(
+    "players_by_ids",
+    "SELECT * FROM players WHERE discord_id = ANY(%s)",
+    "BIGINT[]",
+)
+# Parcours d'index seul sur idx_match_participants_pending.
+_PENDING_MATCH_FOR_PLAYER = prepared.register(
+    "pending_match_for_player",
+    """
+    SELECT 1
+    FROM match_participants
+    WHERE discord_id = %s AND status = 'pending'
+    LIMIT 1
+    """,
+    "BIGINT",
+)
+# SEC #1 : une requête fixe par colonne de score, jamais de nom de colonne interpolé.
+_GAME_RESULT = {
+    label: prepared.register(
+        f"game_result_{column}",
+        f"""
+        UPDATE matches
+        SET {column} = {column} + 1
+        WHERE id = %s AND status = 'pending'
+        RETURNING *
+        """,
+        "INTEGER",
+    )
+    for label, column in (("bleue", "team1_score"), ("rouge", "team2_score"))
+}
+
+
 # ── PERF #1 : Pool de connexions ThreadedConnectionPool ──────────────────────
 # Remplace les open/close répétés par un pool de 2–10 connexions réutilisées.
 _pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
@@ -44,14 +153,23 @@ def _get_pool() -> psycopg2.pool.ThreadedConnectionPool:
         if not config.DATABASE_URL:
             raise RuntimeError("DATABASE_URL environment variable is not set")
         _pool = psycopg2.pool.ThreadedConnectionPool(
-            minconn=2,
-            maxconn=10,
+            minconn=config.DB_POOL_MIN_CONN,
+            maxconn=config.DB_POOL_MAX_CONN,
             dsn=config.DATABASE_URL,
             cursor_factory=RealDictCursor,
+            connection_factory=prepared.PreparingConnection,
         )
     return _pool
 
 
+def close_pool() -> None:
+    """Ferme toutes les connexions du pool (arrêt du bot ou fin de script)."""
+    global _pool
+    if _pool is not None:
+        _pool.closeall()
+        _pool = None
+
+
 @contextmanager
 def get_connection():
     pool = _get_pool()
@@ -114,8 +232,75 @@ def init_db() -> None:
                 ADD COLUMN IF NOT EXISTS team2_score INTEGER NOT NULL DEFAULT 0
                 """
             )
-            # ── PERF #3 : Index GIN pour player_has_pending_match ─────────────
-            # Évite le full scan sur matches à chaque !join.
+            # Message Discord du match (boutons de vote persistants, expiration).
+            cur.execute("ALTER TABLE matches ADD COLUMN IF NOT EXISTS channel_id BIGINT")
+            cur.execute("ALTER TABLE matches ADD COLUMN IF NOT EXISTS message_id BIGINT")
+            # Votes de la manche en cours : survivent à un redémarrage du bot.
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS match_votes (
+                    match_id INTEGER NOT NULL REFERENCES matches (id) ON DELETE CASCADE,
+                    discord_id BIGINT NOT NULL,
+                    label TEXT NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    PRIMARY KEY (match_id, discord_id)
+                )
+                """
+            )
+            # ── PERF #3 : Participants normalisés ────────────────────────────
+            # Une ligne par joueur et par match : matchs en attente et
+            # historique d'un joueur se lisent par index B-tree, sans prédicat
+            # sur les tableaux team1_ids/team2_ids.
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS match_participants (
+                    match_id INTEGER NOT NULL REFERENCES matches (id) ON DELETE CASCADE,
+                    discord_id BIGINT NOT NULL,
+                    team SMALLINT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    elo_before INTEGER,
+                    elo_after INTEGER,
+                    completed_at TIMESTAMPTZ,
+                    PRIMARY KEY (match_id, discord_id)
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_match_participants_pending
+                ON match_participants (discord_id)
+                WHERE status = 'pending'
+                """
+            )
+            cur.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_match_participants_history
+                ON match_participants (discord_id, completed_at DESC, match_id DESC)
+                INCLUDE (team, elo_before, elo_after)
+                WHERE status = 'completed'
+                """
+            )
+            # Migration : participants des matchs antérieurs à la table.
+            # L'ELO avant/après de ces matchs se reconstitue avec
+            # `python -m tiers_nb_esport.replay --participants`.
+            cur.execute(
+                """
+                INSERT INTO match_participants (match_id, discord_id, team, status, completed_at)
+                SELECT m.id, t.discord_id, t.team, m.status, m.completed_at
+                FROM matches AS m
+                CROSS JOIN LATERAL (
+                    SELECT unnest(m.team1_ids), 1
+                    UNION ALL
+                    SELECT unnest(m.team2_ids), 2
+                ) AS t(discord_id, team)
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM match_participants AS mp WHERE mp.match_id = m.id
+                )
+                ON CONFLICT DO NOTHING
+                """
+            )
+            # Index GIN conservés : les routes web filtrent encore `matches` par
+            # appartenance à team1_ids/team2_ids (opérateur `cs`, soit `@>`).
             cur.execute(
                 """
                 CREATE INDEX IF NOT EXISTS idx_matches_team1_ids
@@ -135,62 +320,167 @@ def init_db() -> None:
                 WHERE status = 'pending'
                 """
             )
+            # Parcours chronologique des matchs terminés (replay des ratings).
+            cur.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_matches_completed_at
+                ON matches (completed_at, id)
+                WHERE status = 'completed'
+                """
+            )
+            # Index couvrant du classement : la pagination par clé le parcourt
+            # directement à partir du curseur, sans tri ni lecture de la table.
+            cur.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_players_leaderboard
+                ON players (solo_elo DESC, solo_wins DESC, solo_losses ASC, name ASC, discord_id ASC)
+                INCLUDE (division)
+                """
+            )
+            # Instantané rang/tier, lisible par tout consommateur sans trier `players`.
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS player_ranks (
+                    discord_id BIGINT PRIMARY KEY
+                        REFERENCES players (discord_id) ON DELETE CASCADE,
+                    rank INTEGER NOT NULL,
+                    tier TEXT,
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_player_ranks_rank
+                ON player_ranks (rank)
+                """
+            )
 
 
-def ensure_player(discord_id: int, name: Optional[str], division: Optional[str] = None) -> Player:
-    division = division or config.DEFAULT_DIVISION
+def _clean_name(name: Optional[str]) -> Optional[str]:
     # SEC #4 : le display_name Discord est contrôlé par l'utilisateur.
     # On le tronque à 100 caractères et on retire les caractères nuls.
     if name:
         name = name.replace("\x00", "").strip()[:100] or None
+    return name
+
+
+def _upsert_players(cur, entries: List[Tuple[int, Optional[str], str]]) -> List[Dict]:
+    """UPSERT groupé ; retourne toutes les lignes demandées, modifiées ou non.
+
+    Une ligne existante n'est réécrite que si son nom ou sa division change
+    (un nom None conserve le nom actuel). La CTE `upserted` ne renvoie que les
+    lignes écrites : les autres sont relues dans la même requête.
+    """
+    if not entries:
+        return []
+    return execute_values(
+        cur,
+        """
+        WITH input (discord_id, name, division) AS (VALUES %s),
+        upserted AS (
+            INSERT INTO players (discord_id, name, division)
+            SELECT discord_id, name, division FROM input
+            ON CONFLICT (discord_id) DO UPDATE
+            SET name = COALESCE(EXCLUDED.name, players.name),
+                division = EXCLUDED.division,
+                updated_at = NOW()
+            WHERE players.name IS DISTINCT FROM COALESCE(EXCLUDED.name, players.name)
+               OR players.division IS DISTINCT FROM EXCLUDED.division
+            RETURNING players.*, (xmax = 0) AS inserted, TRUE AS written
+        )
+        SELECT * FROM upserted
+        UNION ALL
+        SELECT p.*, FALSE AS inserted, FALSE AS written
+        FROM players AS p
+        JOIN input USING (discord_id)
+        WHERE NOT EXISTS (SELECT 1 FROM upserted AS u WHERE u.discord_id = p.discord_id)
+        """,
+        entries,
+        template="(%s::BIGINT, %s::TEXT, %s::TEXT)",
+        page_size=max(1, len(entries)),
+        fetch=True,
+    )
+
+
+def ensure_players(
+    entries: Iterable[Tuple[int, Optional[str]]], division: Optional[str] = None
+) -> Dict[int, Player]:
+    """Crée ou met à jour plusieurs joueurs en une requête (aucune si tous sont en cache)."""
+    division = division or config.DEFAULT_DIVISION
+    wanted: Dict[int, Optional[str]] = {}
+    for discord_id, name in entries:
+        wanted[int(discord_id)] = _clean_name(name)
+
+    players, _ = player_cache.get_many(wanted)
+    players = {
+        discord_id: player
+        for discord_id, player in players.items()
+        if player.division == division and wanted[discord_id] in (None, player.name)
+    }
+    to_write = [(pid, name, division) for pid, name in wanted.items() if pid not in players]
+    if not to_write:
+        return players
+
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO players (discord_id, name, division)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (discord_id) DO UPDATE
-                SET name = EXCLUDED.name,
-                    division = EXCLUDED.division,
-                    updated_at = NOW()
-                RETURNING *
-                """,
-                (discord_id, name, division),
-            )
-            row = cur.fetchone()
-            return Player.from_row(row)
+            rows = _upsert_players(cur, to_write)
+            returned = {int(row["discord_id"]) for row in rows}
+            lost = [entry for entry in to_write if entry[0] not in returned]
+            if lost:
+                # Ligne insérée par une transaction concurrente après notre instantané.
+                rows += _upsert_players(cur, lost)
+
+    inserted = sum(1 for row in rows if row["inserted"])
+    if inserted:
+        _note_players_inserted(inserted)
+    written = [row for row in rows if row["written"]]
+    if written:
+        _bump_ratings_version()
+
+        def apply() -> None:
+            for row in written:
+                leaderboard.upsert(
+                    row["discord_id"], row["solo_elo"], row["solo_wins"], row["solo_losses"], row["name"]
+                )
+
+        _sync_rankings([int(row["discord_id"]) for row in written], apply)
+    fetched = [Player.from_row(row) for row in rows]
+    player_cache.put_many(fetched)
+    players.update((player.discord_id, player) for player in fetched)
+    return players
+
+
+def ensure_player(discord_id: int, name: Optional[str], division: Optional[str] = None) -> Player:
+    return ensure_players([(discord_id, name)], division)[int(discord_id)]
 
 
 def fetch_players(discord_ids: Iterable[int]) -> Dict[int, Player]:
-    ids = list({int(i) for i in discord_ids})
+    players, ids = player_cache.get_many({int(i) for i in discord_ids})
     if not ids:
-        return {}
+        return players
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT *
-                FROM players
-                WHERE discord_id = ANY(%s)
-                """,
-                (ids,),
-            )
-            return {int(row["discord_id"]): Player.from_row(row) for row in cur.fetchall()}
+            prepared.execute(cur, _PLAYERS_BY_IDS, (ids,))
+            fetched = [Player.from_row(row) for row in cur.fetchall()]
+    player_cache.put_many(fetched)
+    players.update((player.discord_id, player) for player in fetched)
+    return players
 
 
 def fetch_player(discord_id: int) -> Optional[Player]:
+    cached = player_cache.get(discord_id)
+    if cached:
+        return cached
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT *
-                FROM players
-                WHERE discord_id = %s
-                """,
-                (discord_id,),
-            )
+            prepared.execute(cur, _PLAYER_BY_ID, (discord_id,))
             row = cur.fetchone()
-            return Player.from_row(row) if row else None
+    if not row:
+        return None
+    player = Player.from_row(row)
+    player_cache.put(player)
+    return player
 
 
 def fetch_leaderboard(limit: int = 10) -> Tuple[List[Player], int]:
@@ -246,24 +536,217 @@ def fetch_leaderboard_page(limit: int = 10, offset: int = 0) -> Tuple[List[Playe
     return players, total_players
 
 
+def _note_players_inserted(count: int) -> None:
+    global _player_count
+    with _player_count_lock:
+        if _player_count is not None:
+            _player_count += count
+
+
+def count_players(max_age: Optional[float] = None) -> int:
+    """Nombre de joueurs, mis en cache `LEADERBOARD_COUNT_TTL` secondes.
+
+    Si le classement mémoire est chargé, sa taille fait foi. Sinon, les
+    inscriptions faites par ce processus sont comptées au fil de l'eau ; le
+    TTL ne sert qu'à rattraper les écritures externes (scripts).
+    """
+    global _player_count, _player_count_at
+    if leaderboard.loaded:
+        return len(leaderboard)
+    max_age = config.LEADERBOARD_COUNT_TTL if max_age is None else max_age
+    with _player_count_lock:
+        if _player_count is not None and time.monotonic() - _player_count_at < max_age:
+            return _player_count
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) AS count FROM players")
+            count = int(cur.fetchone()["count"])
+    with _player_count_lock:
+        _player_count, _player_count_at = count, time.monotonic()
+    return count
+
+
+def ratings_version() -> int:
+    return _ratings_version
+
+
+def _bump_ratings_version() -> None:
+    global _ratings_version
+    with _ratings_version_lock:
+        _ratings_version += 1
+
+
+def leaderboard_key(row: Dict) -> LeaderboardKey:
+    return (
+        int(row["solo_elo"]),
+        int(row["solo_wins"]),
+        int(row["solo_losses"]),
+        row.get("name"),
+        int(row["discord_id"]),
+    )
+
+
+def _keyset_condition(key: LeaderboardKey, after: bool) -> Tuple[str, Tuple]:
+    """Prédicat « strictement après (ou avant) `key` » dans l'ordre du classement.
+
+    L'ordre mélange DESC et ASC, et `name` peut être NULL (trié en dernier) :
+    la comparaison de tuples SQL ne s'applique pas, on déroule donc le prédicat.
+    """
+    elo, wins, losses, name, discord_id = key
+    if after:
+        elo_op, wins_op, losses_op, id_op = "<", "<", ">", ">"
+    else:
+        elo_op, wins_op, losses_op, id_op = ">", ">", "<", "<"
+
+    if name is None:
+        name_cond, name_params = ("FALSE", ()) if after else ("name IS NOT NULL", ())
+        same_name = "name IS NULL"
+        same_params: Tuple = ()
+    else:
+        if after:
+            name_cond, name_params = "(name > %s OR name IS NULL)", (name,)
+        else:
+            name_cond, name_params = "name < %s", (name,)
+        same_name, same_params = "name = %s", (name,)
+
+    # La première borne sur solo_elo est redondante mais « sargable » : elle
+    # positionne le parcours d'index directement sur le curseur.
+    sql = f"""
+        solo_elo {elo_op}= %s AND (
+            solo_elo {elo_op} %s
+            OR (solo_elo = %s AND (
+                solo_wins {wins_op} %s
+                OR (solo_wins = %s AND (
+                    solo_losses {losses_op} %s
+                    OR (solo_losses = %s AND (
+                        {name_cond}
+                        OR ({same_name} AND discord_id {id_op} %s)
+                    ))
+                ))
+            ))
+        )
+    """
+    params = (
+        (elo, elo, elo, wins, wins, losses, losses)
+        + name_params
+        + same_params
+        + (discord_id,)
+    )
+    return sql, params
+
+
+def _keyset_statement(name: str, key: Optional[LeaderboardKey], after: bool) -> prepared.Statement:
+    where, params = ("TRUE", ()) if key is None else _keyset_condition(key, after=after)
+    order = (
+        "solo_elo DESC, solo_wins DESC, solo_losses ASC, name ASC, discord_id ASC"
+        if key is None or after
+        else "solo_elo ASC, solo_wins ASC, solo_losses DESC, name DESC, discord_id DESC"
+    )
+    # Paramètres de `_keyset_condition` : 7 bornes entières, 0 à 2 noms, puis discord_id.
+    types = ["INTEGER"] * 7 + ["TEXT"] * (len(params) - 8) + ["BIGINT"] if params else []
+    return prepared.register(
+        name,
+        f"""
+        SELECT discord_id, name, solo_elo, solo_wins, solo_losses, division
+        FROM players
+        WHERE {where}
+        ORDER BY {order}
+        LIMIT %s
+        """,
+        *types,
+        "INTEGER",
+    )
+
+
+# PERF #10 : une requête préparée par forme du prédicat (sens, curseur sans nom).
+_LEADERBOARD_KEYSET: Dict[Tuple[str, bool], prepared.Statement] = {
+    ("first", False): _keyset_statement("leaderboard_first", None, after=True),
+    ("after", False): _keyset_statement("leaderboard_after", (0, 0, 0, "", 0), after=True),
+    ("after", True): _keyset_statement("leaderboard_after_unnamed", (0, 0, 0, None, 0), after=True),
+    ("before", False): _keyset_statement("leaderboard_before", (0, 0, 0, "", 0), after=False),
+    ("before", True): _keyset_statement(
+        "leaderboard_before_unnamed", (0, 0, 0, None, 0), after=False
+    ),
+}
+
+
+def fetch_leaderboard_keyset(
+    limit: int = 10,
+    after: Optional[LeaderboardKey] = None,
+    before: Optional[LeaderboardKey] = None,
+) -> LeaderboardPage:
+    """Page du classement par pagination par clé (seek).
+
+    `after` : page suivant la ligne donnée (dernière de la page courante) ;
+    `before` : page précédant la ligne donnée (première de la page courante) ;
+    aucun des deux : première page. Le coût ne dépend pas de la profondeur.
+    """
+    limit = max(1, int(limit))
+    backward = before is not None
+    statement, params = _LEADERBOARD_KEYSET[("first", False)], ()
+    if backward:
+        statement = _LEADERBOARD_KEYSET[("before", before[3] is None)]
+        _, params = _keyset_condition(before, after=False)
+    elif after is not None:
+        statement = _LEADERBOARD_KEYSET[("after", after[3] is None)]
+        _, params = _keyset_condition(after, after=True)
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            prepared.execute(cur, statement, params + (limit + 1,))
+            rows = cur.fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backward:
+        rows.reverse()
+        has_previous, has_next = has_more, True
+    else:
+        has_previous, has_next = after is not None, has_more
+
+    return LeaderboardPage(
+        players=[Player.from_row(row) for row in rows],
+        first_key=leaderboard_key(rows[0]) if rows else None,
+        last_key=leaderboard_key(rows[-1]) if rows else None,
+        has_previous=has_previous,
+        has_next=has_next,
+        total_players=count_players(),
+    )
+
+
 def record_match(team1_ids: List[int], team2_ids: List[int], map_info: Dict[str, str]) -> Dict:
+    """Crée le match et ses lignes `match_participants` en une requête."""
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
-                INSERT INTO matches (map_mode, map_name, map_emoji, team1_ids, team2_ids)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING *
-                """,
-                (
-                    map_info.get("mode"),
-                    map_info.get("map"),
-                    map_info.get("emoji"),
-                    team1_ids,
-                    team2_ids,
+                WITH created AS (
+                    INSERT INTO matches (map_mode, map_name, map_emoji, team1_ids, team2_ids)
+                    VALUES (%(mode)s, %(map)s, %(emoji)s, %(team1)s, %(team2)s)
+                    RETURNING *
                 ),
+                participants AS (
+                    INSERT INTO match_participants (match_id, discord_id, team)
+                    SELECT created.id, t.discord_id, t.team
+                    FROM created,
+                         unnest(%(ids)s::BIGINT[], %(teams)s::SMALLINT[]) AS t(discord_id, team)
+                    ON CONFLICT DO NOTHING
+                )
+                SELECT * FROM created
+                """,
+                {
+                    "mode": map_info.get("mode"),
+                    "map": map_info.get("map"),
+                    "emoji": map_info.get("emoji"),
+                    "team1": team1_ids,
+                    "team2": team2_ids,
+                    "ids": list(team1_ids) + list(team2_ids),
+                    "teams": [1] * len(team1_ids) + [2] * len(team2_ids),
+                },
             )
-            return cur.fetchone()
+            match = cur.fetchone()
+    pending_index.add(match)
+    return match
 
 
 def load_match(match_id: int) -> Optional[Dict]:
@@ -281,26 +764,76 @@ def load_match(match_id: int) -> Optional[Dict]:
 
 
 def record_game_result(match_id: int, winner_label: str) -> Optional[Dict]:
-    # SEC #1 : whitelist stricte — `winner_label` ne doit JAMAIS être interpolé
-    # directement dans une f-string SQL sans validation explicite.
-    # On mappe vers un nom de colonne fixe plutôt que d'utiliser la valeur brute.
-    _SCORE_COLUMN_MAP = {"bleue": "team1_score", "rouge": "team2_score"}
-    column = _SCORE_COLUMN_MAP.get(winner_label)
-    if column is None:
+    # SEC #1 : whitelist stricte — `winner_label` choisit une requête préparée
+    # fixe, il n'est jamais interpolé dans le SQL.
+    statement = _GAME_RESULT.get(winner_label)
+    if statement is None:
         raise ValueError(f"winner_label invalide : {winner_label!r}")
 
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            prepared.execute(cur, statement, (match_id,))
+            return cur.fetchone()
+
+
+def set_match_message(match_id: int, channel_id: int, message_id: int) -> None:
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                f"""
+                """
                 UPDATE matches
-                SET {column} = {column} + 1
-                WHERE id = %s AND status = 'pending'
-                RETURNING *
+                SET channel_id = %s,
+                    message_id = %s
+                WHERE id = %s
                 """,
-                (match_id,),
+                (channel_id, message_id, match_id),
             )
-            return cur.fetchone()
+
+
+def load_vote_state(match_id: int) -> Optional[Tuple[Dict, List[Tuple[int, str]]]]:
+    """Match en attente et votes de sa manche en cours ; None si le match est clos."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT * FROM matches WHERE id = %s AND status = 'pending'", (match_id,)
+            )
+            match = cur.fetchone()
+            if match is None:
+                return None
+            cur.execute(
+                "SELECT discord_id, label FROM match_votes WHERE match_id = %s", (match_id,)
+            )
+            votes = [(int(row["discord_id"]), row["label"]) for row in cur.fetchall()]
+    return match, votes
+
+
+def record_vote(match_id: int, discord_id: int, label: str) -> bool:
+    """Enregistre un vote ; False si le joueur a déjà voté ou si le match est clos."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO match_votes (match_id, discord_id, label)
+                SELECT %s, %s, %s
+                WHERE EXISTS (SELECT 1 FROM matches WHERE id = %s AND status = 'pending')
+                ON CONFLICT (match_id, discord_id) DO NOTHING
+                """,
+                (match_id, discord_id, label, match_id),
+            )
+            return cur.rowcount == 1
+
+
+def close_vote_round(match_id: int, winner_label: str) -> Optional[Dict]:
+    """Compte la manche pour `winner_label` et repart d'un vote vide, dans la même transaction."""
+    statement = _GAME_RESULT.get(winner_label)
+    if statement is None:
+        raise ValueError(f"winner_label invalide : {winner_label!r}")
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            prepared.execute(cur, statement, (match_id,))
+            match = cur.fetchone()
+            cur.execute("DELETE FROM match_votes WHERE match_id = %s", (match_id,))
+    return match
 
 
 def update_match_series_score(
@@ -321,55 +854,315 @@ def update_match_series_score(
             return cur.fetchone()
 
 
+def _close_match(
+    cur,
+    match_id: int,
+    status: str,
+    winner: Optional[str] = None,
+    updates: Sequence[Dict[str, int]] = (),
+    elo_before: Optional[Dict[int, int]] = None,
+) -> Optional[Dict]:
+    """Clôt le match, ses participants, ses votes et applique `updates` en une seule requête."""
+    elo_before = elo_before or {}
+    cur.execute(
+        """
+        WITH ratings AS (
+            SELECT *
+            FROM unnest(
+                %(ids)s::BIGINT[], %(before)s::INTEGER[], %(elo)s::INTEGER[],
+                %(wins)s::INTEGER[], %(losses)s::INTEGER[]
+            ) AS v(discord_id, elo_before, solo_elo, solo_wins, solo_losses)
+        ),
+        updated AS (
+            UPDATE players AS p
+            SET solo_elo    = v.solo_elo,
+                solo_wins   = v.solo_wins,
+                solo_losses = v.solo_losses,
+                updated_at  = NOW()
+            FROM ratings AS v
+            WHERE p.discord_id = v.discord_id
+        ),
+        closed AS (
+            UPDATE matches
+            SET status = %(status)s,
+                winner = %(winner)s,
+                completed_at = NOW()
+            WHERE id = %(match_id)s
+            RETURNING *
+        ),
+        participants AS (
+            UPDATE match_participants AS mp
+            SET status = closed.status,
+                completed_at = closed.completed_at,
+                elo_before = (SELECT v.elo_before FROM ratings AS v WHERE v.discord_id = mp.discord_id),
+                elo_after = (SELECT v.solo_elo FROM ratings AS v WHERE v.discord_id = mp.discord_id)
+            FROM closed
+            WHERE mp.match_id = closed.id
+        ),
+        votes AS (
+            DELETE FROM match_votes AS mv
+            USING closed
+            WHERE mv.match_id = closed.id
+        )
+        SELECT * FROM closed
+        """,
+        {
+            "ids": [int(u["discord_id"]) for u in updates],
+            "before": [elo_before.get(int(u["discord_id"])) for u in updates],
+            "elo": [int(u["solo_elo"]) for u in updates],
+            "wins": [int(u["solo_wins"]) for u in updates],
+            "losses": [int(u["solo_losses"]) for u in updates],
+            "status": status,
+            "winner": winner,
+            "match_id": match_id,
+        },
+    )
+    return cur.fetchone()
+
+
+def _forget_match(match_id: int, match: Optional[Dict]) -> None:
+    pending_index.remove(match_id)
+    if match:
+        history_cache.invalidate(list(match["team1_ids"]) + list(match["team2_ids"]))
+
+
 def complete_match(match_id: int, winner_label: str) -> Optional[Dict]:
     with get_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                UPDATE matches
-                SET status = 'completed',
-                    winner = %s,
-                    completed_at = NOW()
-                WHERE id = %s
-                RETURNING *
-                """,
-                (winner_label, match_id),
-            )
-            return cur.fetchone()
+            match = _close_match(cur, match_id, "completed", winner_label)
+    _forget_match(match_id, match)
+    return match
 
 
 def cancel_match(match_id: int) -> Optional[Dict]:
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            match = _close_match(cur, match_id, "cancelled")
+    _forget_match(match_id, match)
+    return match
+
+
+def expire_matches(match_ids: Sequence[int]) -> List[Dict]:
+    """Annule en une requête les matchs encore `pending` parmi `match_ids`.
+
+    Participants et votes sont clos dans la même requête ; seuls les matchs
+    réellement annulés sont retournés (un match finalisé entre-temps est ignoré).
+    """
+    if not match_ids:
+        return []
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
-                UPDATE matches
-                SET status = 'cancelled',
-                    completed_at = NOW()
-                WHERE id = %s
-                RETURNING *
+                WITH closed AS (
+                    UPDATE matches
+                    SET status = 'cancelled',
+                        completed_at = NOW()
+                    WHERE id = ANY(%(ids)s) AND status = 'pending'
+                    RETURNING *
+                ),
+                participants AS (
+                    UPDATE match_participants AS mp
+                    SET status = closed.status,
+                        completed_at = closed.completed_at
+                    FROM closed
+                    WHERE mp.match_id = closed.id
+                ),
+                votes AS (
+                    DELETE FROM match_votes AS mv
+                    USING closed
+                    WHERE mv.match_id = closed.id
+                )
+                SELECT * FROM closed
                 """,
-                (match_id,),
+                {"ids": [int(match_id) for match_id in match_ids]},
             )
-            return cur.fetchone()
+            matches = cur.fetchall()
+    for match in matches:
+        _forget_match(int(match["id"]), match)
+    return matches
 
 
-def player_has_pending_match(discord_id: int) -> bool:
+def fetch_pending_created_at() -> List[Tuple[int, datetime]]:
+    """(id, created_at) des matchs `pending`, pour le planificateur d'expiration."""
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id, created_at FROM matches WHERE status = 'pending'")
+            return [(int(row["id"]), row["created_at"]) for row in cur.fetchall()]
+
+
+def finalize_match(
+    match_id: int,
+    winner_label: str,
+    settle: SettleFn,
+    resolve_name: Optional[Callable[[int], Optional[str]]] = None,
+) -> Optional[MatchFinalization]:
+    """Finalise un match en une seule transaction.
+
+    Le match puis ses joueurs (par discord_id croissant, pour éviter les
+    interblocages) sont verrouillés `FOR UPDATE` : deux votes majoritaires
+    simultanés sont sérialisés et le second voit le match déjà traité.
+    `settle` calcule les mises à jour à partir des lignes verrouillées ; les
+    stats joueurs, le statut du match et ses participants (ELO avant/après)
+    sont écrits par une seule requête.
+    `winner_label == "annulee"` annule le match sans toucher aux joueurs.
+    Si `settle` ne renvoie aucune mise à jour, le match n'est pas clos (None).
+    Les joueurs absents de `players` sont créés avec le nom donné par `resolve_name`.
+    """
+    new_rows: List[Dict] = []
+    updates: List[Dict[str, int]] = []
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT * FROM matches WHERE id = %s FOR UPDATE", (match_id,))
+            match = cur.fetchone()
+            if match is None:
+                return None
+            if match["status"] != "pending":
+                return MatchFinalization(match, finalized=False)
+
+            if winner_label == "annulee":
+                match = _close_match(cur, match_id, "cancelled")
+            else:
+                ids = sorted({int(pid) for pid in list(match["team1_ids"]) + list(match["team2_ids"])})
+                cur.execute(
+                    """
+                    SELECT *
+                    FROM players
+                    WHERE discord_id = ANY(%s)
+                    ORDER BY discord_id
+                    FOR UPDATE
+                    """,
+                    (ids,),
+                )
+                rows = cur.fetchall()
+                found = {int(row["discord_id"]) for row in rows}
+                missing = [pid for pid in ids if pid not in found]
+                if missing:
+                    resolve_name = resolve_name or (lambda _pid: None)
+                    new_rows = _upsert_players(
+                        cur,
+                        [
+                            (pid, _clean_name(resolve_name(pid)), config.DEFAULT_DIVISION)
+                            for pid in missing
+                        ],
+                    )
+                    rows += new_rows
+                players = {int(row["discord_id"]): Player.from_row(row) for row in rows}
+
+                updates = settle(match, players)
+                if not updates:
+                    # Rien à régler (équipe vide) : le match reste `pending`.
+                    return None
+                match = _close_match(
+                    cur,
+                    match_id,
+                    "completed",
+                    winner_label,
+                    updates,
+                    {pid: player.solo_elo for pid, player in players.items()},
+                )
+
+    _forget_match(match_id, match)
+    if updates or new_rows:
+        _publish_player_updates(updates, new_rows)
+    return MatchFinalization(match, finalized=True)
+
+
+def load_pending_index() -> int:
+    """Charge l'index mémoire depuis les matchs `pending`. Retourne leur nombre."""
     with get_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
-                SELECT 1
+                SELECT id, team1_ids, team2_ids
                 FROM matches
                 WHERE status = 'pending'
-                  AND (%s = ANY(team1_ids) OR %s = ANY(team2_ids))
-                LIMIT 1
-                """,
-                (discord_id, discord_id),
+                """
             )
+            pending_index.load(cur.fetchall())
+    return len(pending_index)
+
+
+def _player_has_pending_match_db(discord_id: int) -> bool:
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            prepared.execute(cur, _PENDING_MATCH_FOR_PLAYER, (discord_id,))
             return cur.fetchone() is not None
 
 
+def fetch_player_history(
+    discord_id: int, limit: int = 10, after: Optional[HistoryKey] = None
+) -> HistoryPage:
+    """Matchs terminés du joueur, du plus récent au plus ancien, page par clé.
+
+    `after` : clé de la dernière ligne de la page précédente. Lecture de
+    l'index idx_match_participants_history à partir du curseur, puis du
+    match par clé primaire.
+    """
+    limit = max(1, int(limit))
+    cached = history_cache.get(discord_id, (limit, after))
+    if cached is not None:
+        return cached
+    generation = history_cache.generation
+    where, params = "", (discord_id,)
+    if after is not None:
+        where = "AND (mp.completed_at, mp.match_id) < (%s, %s)"
+        params += (after[0], after[1])
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT mp.match_id, mp.team, mp.elo_before, mp.elo_after, mp.completed_at,
+                       m.map_name, m.map_mode, m.map_emoji, m.winner
+                FROM match_participants AS mp
+                JOIN matches AS m ON m.id = mp.match_id
+                WHERE mp.discord_id = %s AND mp.status = 'completed'
+                  {where}
+                ORDER BY mp.completed_at DESC, mp.match_id DESC
+                LIMIT %s
+                """,
+                params + (limit + 1,),
+            )
+            rows = cur.fetchall()
+
+    entries = [
+        HistoryEntry(
+            match_id=int(row["match_id"]),
+            completed_at=row["completed_at"],
+            map_name=row["map_name"],
+            map_mode=row["map_mode"],
+            map_emoji=row["map_emoji"],
+            won=(row["winner"] == "bleue") == (row["team"] == 1),
+            elo_before=row["elo_before"],
+            elo_after=row["elo_after"],
+        )
+        for row in rows[:limit]
+    ]
+    page = HistoryPage(entries, entries[-1].key if len(rows) > limit else None)
+    history_cache.put(discord_id, (limit, after), page, generation)
+    return page
+
+
+def player_has_pending_match(discord_id: int) -> bool:
+    mode = config.PENDING_INDEX_MODE
+    if mode == "db" or not pending_index.loaded:
+        return _player_has_pending_match_db(discord_id)
+
+    in_index = pending_index.contains(discord_id)
+    if mode != "verify":
+        return in_index
+
+    in_db = _player_has_pending_match_db(discord_id)
+    if in_db != in_index:
+        logger.warning(
+            "Index des matchs en attente désynchronisé pour %s (index=%s, base=%s)",
+            discord_id,
+            in_index,
+            in_db,
+        )
+    return in_db
+
+
 def apply_player_updates(updates: Iterable[Dict[str, int]]) -> None:
     """
     PERF #2 : Batch UPDATE avec execute_values au lieu de N requêtes en boucle.
@@ -405,3 +1198,177 @@ def apply_player_updates(updates: Iterable[Dict[str, int]]) -> None:
                 rows,
                 template="(%s, %s, %s, %s)",
             )
+    _publish_player_updates(updates)
+
+
+def _publish_player_updates(updates: List[Dict[str, int]], new_rows: Iterable[Dict] = ()) -> None:
+    """Reporte des mises à jour déjà commitées sur les caches et le classement mémoire."""
+    new_rows = list(new_rows)
+    if new_rows:
+        _note_players_inserted(sum(1 for row in new_rows if row.get("inserted")))
+        player_cache.put_many(Player.from_row(row) for row in new_rows)
+    player_cache.apply_updates(updates)
+    _bump_ratings_version()
+
+    def apply() -> None:
+        for row in new_rows:
+            leaderboard.upsert(
+                row["discord_id"], row["solo_elo"], row["solo_wins"], row["solo_losses"], row["name"]
+            )
+        leaderboard.apply_updates(updates)
+
+    _sync_rankings([int(u["discord_id"]) for u in updates], apply)
+
+
+def _write_rank_rows(rows: List[RankRow]) -> None:
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            execute_values(
+                cur,
+                """
+                INSERT INTO player_ranks (discord_id, rank, tier)
+                VALUES %s
+                ON CONFLICT (discord_id) DO UPDATE
+                SET rank = EXCLUDED.rank,
+                    tier = EXCLUDED.tier,
+                    updated_at = NOW()
+                WHERE player_ranks.rank IS DISTINCT FROM EXCLUDED.rank
+                   OR player_ranks.tier IS DISTINCT FROM EXCLUDED.tier
+                """,
+                [(row.discord_id, row.rank, row.tier) for row in rows],
+                template="(%s, %s, %s)",
+                page_size=1000,
+            )
+
+
+def _sync_rankings(discord_ids: Iterable[int], apply: Callable[[], None]) -> None:
+    """Applique `apply` au classement mémoire et met de côté les tranches de rangs touchées.
+
+    Aucune écriture ici : un nouveau joueur décale tous les rangs inférieurs,
+    les lignes sont fusionnées par joueur et écrites en lot par `flush_rank_rows`.
+    """
+    if not leaderboard.loaded:
+        return
+    with _ranking_lock:
+        old_ranks = {int(i): leaderboard.rank_of(i) for i in discord_ids}
+        apply()
+        if rank_snapshot.loaded:
+            rows = rank_snapshot.refresh(old_ranks)
+            if rows:
+                with _pending_rank_lock:
+                    for row in rows:
+                        _pending_rank_rows[row.discord_id] = row
+
+
+def flush_rank_rows() -> int:
+    """Écrit en une requête les rangs modifiés depuis le dernier appel ; retourne leur nombre.
+
+    `player_ranks` est un instantané dérivé de `players` (reconstruit au
+    démarrage) : il peut avoir quelques secondes de retard. En cas d'échec, les
+    lignes sont remises en attente sans écraser un état plus récent.
+    """
+    with _rank_flush_lock:
+        with _pending_rank_lock:
+            if not _pending_rank_rows:
+                return 0
+            rows = list(_pending_rank_rows.values())
+            _pending_rank_rows.clear()
+        try:
+            _write_rank_rows(rows)
+        except Exception:
+            with _pending_rank_lock:
+                for row in rows:
+                    _pending_rank_rows.setdefault(row.discord_id, row)
+            raise
+    return len(rows)
+
+
+def iter_completed_matches(batch_size: int = 2000) -> Iterator[Dict]:
+    """Parcourt les matchs terminés par `completed_at` via un curseur serveur.
+
+    Seules `batch_size` lignes sont en mémoire à la fois, quelle que soit la
+    taille de l'historique.
+    """
+    with get_connection() as conn:
+        with conn.cursor(name="iter_completed_matches") as cur:
+            cur.itersize = max(1, int(batch_size))
+            cur.execute(
+                """
+                SELECT id, team1_ids, team2_ids, winner, completed_at
+                FROM matches
+                WHERE status = 'completed'
+                  AND winner IN ('bleue', 'rouge')
+                ORDER BY completed_at, id
+                """
+            )
+            for row in cur:
+                yield row
+
+
+def write_participant_ratings(rows: Iterable[Tuple[int, int, int, int]]) -> int:
+    """Renseigne elo_before/elo_after de `match_participants` (match_id, discord_id, avant, après).
+
+    Seules les lignes encore vides sont remplies : les matchs clos par le bot
+    depuis la création de la table gardent les valeurs écrites en direct.
+    Retourne le nombre de lignes réellement mises à jour.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            updated = execute_values(
+                cur,
+                """
+                UPDATE match_participants AS mp
+                SET elo_before = v.elo_before,
+                    elo_after = v.elo_after
+                FROM (VALUES %s) AS v(match_id, discord_id, elo_before, elo_after)
+                WHERE mp.match_id = v.match_id
+                  AND mp.discord_id = v.discord_id
+                  AND mp.elo_before IS NULL
+                  AND mp.elo_after IS NULL
+                RETURNING 1
+                """,
+                rows,
+                template="(%s::INTEGER, %s::BIGINT, %s::INTEGER, %s::INTEGER)",
+                page_size=1000,
+                fetch=True,
+            )
+    return len(updated)
+
+
+def iter_player_stats(batch_size: int = 5000) -> Iterator[Dict]:
+    """Parcourt ELO et bilan de tous les joueurs via un curseur serveur."""
+    with get_connection() as conn:
+        with conn.cursor(name="iter_player_stats") as cur:
+            cur.itersize = max(1, int(batch_size))
+            cur.execute(
+                """
+                SELECT discord_id, name, solo_elo, solo_wins, solo_losses
+                FROM players
+                ORDER BY discord_id
+                """
+            )
+            for row in cur:
+                yield row
+
+
+def load_leaderboard() -> int:
+    """Charge le classement mémoire depuis `players`. Retourne le nombre de joueurs."""
+    leaderboard.load(iter_player_stats())
+    return len(leaderboard)
+
+
+def load_rank_snapshot() -> int:
+    """Reconstruit entièrement player_ranks depuis le classement mémoire (démarrage)."""
+    if not leaderboard.loaded:
+        load_leaderboard()
+    with _ranking_lock:
+        with _pending_rank_lock:
+            _pending_rank_rows.clear()
+        written = 0
+        for rows in rank_snapshot.rebuild():
+            _write_rank_rows(rows)
+            written += len(rows)
+    return written
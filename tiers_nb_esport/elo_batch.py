@@ -0,0 +1,99 @@
+"""Calcul ELO par lots : un appel pour tous les joueurs d'un ou plusieurs matchs.
+
+Même règle que `elo_system.calculate_elo_change` (K=30, arrondi au plus proche,
+ELO plancher à 0). Avec numpy, tout le lot est calculé en opérations
+vectorielles ; sans numpy, une boucle Python donne exactement le même résultat.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from . import config
+
+try:  # numpy est facultatif : seuls les replays/simulations massifs en ont besoin
+    import numpy as np
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    np = None
+
+TEAM1 = 0
+TEAM2 = 1
+
+
+@dataclass
+class EloBatchResult:
+    # Listes Python ou tableaux numpy selon le chemin de calcul utilisé.
+    deltas: Sequence[int]
+    new_ratings: Sequence[int]
+
+
+def compute_elo_batch(
+    ratings: Sequence[float],
+    match_index: Sequence[int],
+    teams: Sequence[int],
+    winners: Sequence[int],
+    k_factor: float = config.K_FACTOR,
+    floor: int = 0,
+    use_numpy: Optional[bool] = None,
+) -> EloBatchResult:
+    """Calcule variations et nouveaux ELO pour un lot de joueurs.
+
+    - `ratings[i]` : ELO du joueur i avant le match ;
+    - `match_index[i]` : numéro (0..M-1) du match du joueur i dans le lot ;
+    - `teams[i]` : `TEAM1` ou `TEAM2` ;
+    - `winners[m]` : équipe gagnante du match m.
+
+    Chaque joueur est comparé à la moyenne ELO de l'équipe adverse de son match.
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        if np is None:
+            raise RuntimeError("numpy n'est pas installé")
+        return _compute_numpy(ratings, match_index, teams, winners, k_factor, floor)
+    return _compute_python(ratings, match_index, teams, winners, k_factor, floor)
+
+
+def _compute_python(ratings, match_index, teams, winners, k_factor, floor) -> EloBatchResult:
+    slots = 2 * len(winners)
+    sums = [0.0] * slots
+    counts = [0] * slots
+    for rating, match, team in zip(ratings, match_index, teams):
+        sums[2 * match + team] += rating
+        counts[2 * match + team] += 1
+
+    deltas: List[int] = []
+    new_ratings: List[int] = []
+    for rating, match, team in zip(ratings, match_index, teams):
+        opponent = 2 * match + (1 - team)
+        opponent_avg = sums[opponent] / counts[opponent] if counts[opponent] else rating
+        expected = 1 / (1 + 10 ** ((opponent_avg - rating) / 400))
+        actual = 1.0 if winners[match] == team else 0.0
+        delta = int(round(k_factor * (actual - expected)))
+        deltas.append(delta)
+        new_ratings.append(max(floor, int(rating) + delta))
+    return EloBatchResult(deltas=deltas, new_ratings=new_ratings)
+
+
+def _compute_numpy(ratings, match_index, teams, winners, k_factor, floor) -> EloBatchResult:
+    ratings_arr = np.asarray(ratings, dtype=np.float64)
+    match_arr = np.asarray(match_index, dtype=np.int64)
+    team_arr = np.asarray(teams, dtype=np.int64)
+    winner_arr = np.asarray(winners, dtype=np.int64)
+
+    slot = 2 * match_arr + team_arr
+    slots = 2 * len(winner_arr)
+    sums = np.bincount(slot, weights=ratings_arr, minlength=slots)
+    counts = np.bincount(slot, minlength=slots)
+
+    opponent = 2 * match_arr + (1 - team_arr)
+    opponent_counts = counts[opponent]
+    opponent_avg = np.where(
+        opponent_counts > 0, sums[opponent] / np.maximum(opponent_counts, 1), ratings_arr
+    )
+    expected = 1.0 / (1.0 + np.power(10.0, (opponent_avg - ratings_arr) / 400.0))
+    actual = (winner_arr[match_arr] == team_arr).astype(np.float64)
+    # np.rint arrondit au pair le plus proche, comme round() en Python.
+    deltas = np.rint(k_factor * (actual - expected)).astype(np.int64)
+    new_ratings = np.maximum(floor, ratings_arr.astype(np.int64) + deltas)
+    return EloBatchResult(deltas=deltas, new_ratings=new_ratings)
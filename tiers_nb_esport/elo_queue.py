@@ -0,0 +1,123 @@
+"""File d'attente matchmaking indexée par ELO."""
+from __future__ import annotations
+
+import bisect
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class QueueEntry:
+    discord_id: int
+    elo: int
+    joined_at: float
+    seq: int
+
+    def wait_time(self, now: Optional[float] = None) -> float:
+        return (time.monotonic() if now is None else now) - self.joined_at
+
+
+class EloQueue:
+    """File FIFO qui conserve l'ELO de chaque joueur au moment du `!join`.
+
+    - appartenance et accès à une entrée : dict, O(1) ;
+    - min/max ELO : extrémités d'une liste triée, O(1) ;
+    - plages d'ELO et position dans la file : bisect, O(log n) ;
+    - insertion/retrait : recherche O(log n) puis décalage mémoire de la liste,
+      négligeable pour quelques centaines de joueurs.
+
+    L'ordre d'arrivée est porté par un numéro de séquence croissant : la liste
+    `_order` reste donc triée par simple ajout en fin.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[int, QueueEntry] = {}
+        self._by_elo: List[Tuple[int, int, int]] = []
+        self._order: List[int] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, discord_id: object) -> bool:
+        return discord_id in self._entries
+
+    def __iter__(self) -> Iterator[QueueEntry]:
+        # Les dict conservent l'ordre d'insertion, donc l'ordre d'arrivée.
+        return iter(list(self._entries.values()))
+
+    def get(self, discord_id: int) -> Optional[QueueEntry]:
+        return self._entries.get(discord_id)
+
+    def entries(self) -> List[QueueEntry]:
+        return list(self._entries.values())
+
+    def ids(self) -> List[int]:
+        return list(self._entries)
+
+    def add(self, discord_id: int, elo: int, joined_at: Optional[float] = None) -> QueueEntry:
+        if discord_id in self._entries:
+            raise ValueError(f"Joueur {discord_id} déjà en file")
+        entry = QueueEntry(
+            discord_id=discord_id,
+            elo=int(elo),
+            joined_at=time.monotonic() if joined_at is None else joined_at,
+            seq=next(self._seq),
+        )
+        self._entries[discord_id] = entry
+        bisect.insort(self._by_elo, (entry.elo, entry.seq, discord_id))
+        self._order.append(entry.seq)
+        return entry
+
+    def remove(self, discord_id: int) -> Optional[QueueEntry]:
+        entry = self._entries.pop(discord_id, None)
+        if entry is None:
+            return None
+        key = (entry.elo, entry.seq, discord_id)
+        del self._by_elo[bisect.bisect_left(self._by_elo, key)]
+        del self._order[bisect.bisect_left(self._order, entry.seq)]
+        return entry
+
+    def position(self, discord_id: int) -> Optional[int]:
+        """Position (1 = prochain servi) du joueur dans la file."""
+        entry = self._entries.get(discord_id)
+        if entry is None:
+            return None
+        return bisect.bisect_left(self._order, entry.seq) + 1
+
+    def min_elo(self) -> Optional[int]:
+        return self._by_elo[0][0] if self._by_elo else None
+
+    def max_elo(self) -> Optional[int]:
+        return self._by_elo[-1][0] if self._by_elo else None
+
+    def elo_range(self) -> Optional[Tuple[int, int]]:
+        if not self._by_elo:
+            return None
+        return self._by_elo[0][0], self._by_elo[-1][0]
+
+    def is_compatible(self, elo: int, max_diff: int) -> bool:
+        bounds = self.elo_range()
+        if bounds is None:
+            return True
+        min_elo, max_elo = bounds
+        return abs(elo - min_elo) <= max_diff and abs(elo - max_elo) <= max_diff
+
+    def in_elo_range(self, low: int, high: int) -> List[QueueEntry]:
+        """Entrées dont l'ELO est compris dans [low, high], triées par ELO."""
+        start = bisect.bisect_left(self._by_elo, (low,))
+        end = bisect.bisect_right(self._by_elo, (high, float("inf")))
+        return [self._entries[discord_id] for _, _, discord_id in self._by_elo[start:end]]
+
+    def sorted_by_elo(self) -> List[QueueEntry]:
+        return [self._entries[discord_id] for _, _, discord_id in self._by_elo]
+
+    def pop_first(self, count: int) -> List[QueueEntry]:
+        """Retire les `count` joueurs arrivés en premier."""
+        selected = list(itertools.islice(self._entries, max(0, count)))
+        return [entry for entry in map(self.remove, selected) if entry is not None]
+
+    def pop_many(self, discord_ids: List[int]) -> List[QueueEntry]:
+        return [entry for entry in map(self.remove, discord_ids) if entry is not None]
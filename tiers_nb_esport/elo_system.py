@@ -5,7 +5,7 @@ from typing import Dict, List, Optional, Tuple
 
 import discord
 
-from . import config
+from . import config, elo_batch, team_balance
 from .database import Player
 
 
@@ -29,11 +29,16 @@ def get_rank_emoji(elo: int) -> str:
     return str(get_rank_for_elo(elo).get("emoji", "🏷️"))
 
 
-def balance_teams(players: List[Player]) -> Tuple[List[int], List[int]]:
-    """Équilibre les équipes par ELO alternant (serpent)."""
-    sorted_players = sorted(players, key=lambda p: p.solo_elo, reverse=True)
-    team1_ids = [player.discord_id for player in sorted_players[::2]]
-    team2_ids = [player.discord_id for player in sorted_players[1::2]]
+def balance_teams(
+    players: List[Player], objective: Optional[str] = None
+) -> Tuple[List[int], List[int]]:
+    """Équilibre les équipes en minimisant l'objectif configuré (écart de moyenne ELO par défaut)."""
+    team1_idx, team2_idx = team_balance.split_teams(
+        [player.solo_elo for player in players],
+        objective or config.BALANCE_OBJECTIVE,
+    )
+    team1_ids = [players[i].discord_id for i in team1_idx]
+    team2_ids = [players[i].discord_id for i in team2_idx]
     return team1_ids, team2_ids
 
 
@@ -62,14 +67,7 @@ def finalize_match_result(
     guild: Optional[discord.Guild],
     db_module,
 ) -> Optional[str]:
-    """Traite résultat match et calcule changements ELO."""
-    match = db_module.load_match(match_id)
-    if not match:
-        return None
-
-    if match["status"] != "pending":
-        return f"Le match #{match_id} a déjà été traité ({match['status']})."
-
+    """Traite résultat match et calcule changements ELO (une seule transaction)."""
     if not winner_label:
         return None
 
@@ -77,74 +75,53 @@ def finalize_match_result(
     if normalized not in {"bleue", "rouge", "annulee"}:
         return None
 
-    team1_ids: List[int] = [int(pid) for pid in match["team1_ids"]]
-    team2_ids: List[int] = [int(pid) for pid in match["team2_ids"]]
-
-    if normalized == "annulee":
-        db_module.cancel_match(match_id)
-        return f"Le match #{match_id} a été annulé."
-
-    players_map: Dict[int, Player] = db_module.fetch_players(team1_ids + team2_ids)
-
-    missing_players = [pid for pid in team1_ids + team2_ids if pid not in players_map]
-    for missing_id in missing_players:
-        display_name = None
-        if guild:
-            member = guild.get_member(missing_id)
-            if member:
-                display_name = member.display_name
-        players_map[missing_id] = db_module.ensure_player(missing_id, display_name)
-
-    team1_players = [players_map[pid] for pid in team1_ids if pid in players_map]
-    team2_players = [players_map[pid] for pid in team2_ids if pid in players_map]
-
-    if not team1_players or not team2_players:
-        return None
-
-    opponent_avg_team1 = sum(player.solo_elo for player in team2_players) / len(team2_players)
-    opponent_avg_team2 = sum(player.solo_elo for player in team1_players) / len(team1_players)
-
-    updates: List[Dict[str, int]] = []
     elo_summaries: List[str] = []
 
-    for player in team1_players:
-        won = normalized == "bleue"
-        delta = calculate_elo_change(player.solo_elo, opponent_avg_team1, won)
-        new_elo = max(0, player.solo_elo + delta)
-        solo_wins = player.solo_wins + (1 if won else 0)
-        solo_losses = player.solo_losses + (0 if won else 1)
-        updates.append(
-            {
-                "discord_id": player.discord_id,
-                "solo_elo": new_elo,
-                "solo_wins": solo_wins,
-                "solo_losses": solo_losses,
-            }
-        )
-        elo_summaries.append(
-            f"{_format_player_name(player, guild)} {'+' if delta >= 0 else ''}{delta} → {new_elo}"
+    def settle(match: Dict, players_map: Dict[int, Player]) -> List[Dict[str, int]]:
+        team1_players = [players_map[int(pid)] for pid in match["team1_ids"] if int(pid) in players_map]
+        team2_players = [players_map[int(pid)] for pid in match["team2_ids"] if int(pid) in players_map]
+        if not team1_players or not team2_players:
+            return []
+
+        # PERF #8 : un seul calcul par lot pour les deux équipes (elo_batch).
+        match_players = team1_players + team2_players
+        result = elo_batch.compute_elo_batch(
+            [player.solo_elo for player in match_players],
+            [0] * len(match_players),
+            [elo_batch.TEAM1] * len(team1_players) + [elo_batch.TEAM2] * len(team2_players),
+            [elo_batch.TEAM1 if normalized == "bleue" else elo_batch.TEAM2],
         )
 
-    for player in team2_players:
-        won = normalized == "rouge"
-        delta = calculate_elo_change(player.solo_elo, opponent_avg_team2, won)
-        new_elo = max(0, player.solo_elo + delta)
-        solo_wins = player.solo_wins + (1 if won else 0)
-        solo_losses = player.solo_losses + (0 if won else 1)
-        updates.append(
-            {
-                "discord_id": player.discord_id,
-                "solo_elo": new_elo,
-                "solo_wins": solo_wins,
-                "solo_losses": solo_losses,
-            }
-        )
-        elo_summaries.append(
-            f"{_format_player_name(player, guild)} {'+' if delta >= 0 else ''}{delta} → {new_elo}"
-        )
-
-    db_module.apply_player_updates(updates)
-    db_module.complete_match(match_id, normalized)
+        updates: List[Dict[str, int]] = []
+        for index, player in enumerate(match_players):
+            won = (normalized == "bleue") == (index < len(team1_players))
+            delta = int(result.deltas[index])
+            new_elo = int(result.new_ratings[index])
+            updates.append(
+                {
+                    "discord_id": player.discord_id,
+                    "solo_elo": new_elo,
+                    "solo_wins": player.solo_wins + (1 if won else 0),
+                    "solo_losses": player.solo_losses + (0 if won else 1),
+                }
+            )
+            elo_summaries.append(
+                f"{_format_player_name(player, guild)} {'+' if delta >= 0 else ''}{delta} → {new_elo}"
+            )
+        return updates
+
+    def resolve_name(discord_id: int) -> Optional[str]:
+        member = guild.get_member(discord_id) if guild else None
+        return member.display_name if member else None
+
+    outcome = db_module.finalize_match(match_id, normalized, settle, resolve_name)
+    if outcome is None:
+        return None
+    match = outcome.match
+    if not outcome.finalized:
+        return f"Le match #{match_id} a déjà été traité ({match['status']})."
+    if normalized == "annulee":
+        return f"Le match #{match_id} a été annulé."
 
     score = ""
     team1_score = match.get("team1_score")
@@ -0,0 +1,159 @@
+"""Classement en mémoire : rang d'un joueur, page k et voisins en O(log n)."""
+from __future__ import annotations
+
+import bisect
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Clé de tri croissante équivalente à l'ORDER BY SQL du classement :
+# solo_elo DESC, solo_wins DESC, solo_losses ASC, name ASC NULLS LAST, discord_id ASC.
+SortKey = Tuple[int, int, int, Tuple[int, str], int]
+
+
+@dataclass(frozen=True)
+class RankedPlayer:
+    rank: int
+    discord_id: int
+    name: Optional[str]
+    solo_elo: int
+    solo_wins: int
+    solo_losses: int
+
+    @property
+    def db_key(self) -> Tuple[int, int, int, Optional[str], int]:
+        """Clé au format `database.LeaderboardKey` (curseur de pagination)."""
+        return (self.solo_elo, self.solo_wins, self.solo_losses, self.name, self.discord_id)
+
+
+def _sort_key(
+    discord_id: int, solo_elo: int, solo_wins: int, solo_losses: int, name: Optional[str]
+) -> SortKey:
+    name_key = (0, name) if name is not None else (1, "")
+    return (-int(solo_elo), -int(solo_wins), int(solo_losses), name_key, int(discord_id))
+
+
+def _from_key(rank: int, key: SortKey) -> RankedPlayer:
+    neg_elo, neg_wins, losses, name_key, discord_id = key
+    return RankedPlayer(
+        rank=rank,
+        discord_id=discord_id,
+        name=name_key[1] if name_key[0] == 0 else None,
+        solo_elo=-neg_elo,
+        solo_wins=-neg_wins,
+        solo_losses=losses,
+    )
+
+
+_KEEP = object()
+
+
+class RankedLeaderboard:
+    """Tableau trié des clés de classement + index par joueur.
+
+    Rang, page et voisins se trouvent par bisect (O(log n)) ; une mise à jour
+    retire puis réinsère la clé du joueur (recherche O(log n), puis décalage
+    mémoire du tableau). Chargé une fois au démarrage, puis tenu à jour par
+    `database.ensure_player` et `database.apply_player_updates`.
+
+    L'ordre des noms suit la comparaison Python, qui peut différer de la
+    collation PostgreSQL pour deux joueurs à égalité parfaite de stats.
+    """
+
+    def __init__(self) -> None:
+        self.loaded = False
+        self._keys: List[SortKey] = []
+        self._by_id: Dict[int, SortKey] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, discord_id: object) -> bool:
+        return discord_id in self._by_id
+
+    def load(self, rows: Iterable[Dict]) -> None:
+        by_id = {
+            int(row["discord_id"]): _sort_key(
+                row["discord_id"],
+                row["solo_elo"],
+                row["solo_wins"],
+                row["solo_losses"],
+                row.get("name"),
+            )
+            for row in rows
+        }
+        with self._lock:
+            self._by_id = by_id
+            self._keys = sorted(by_id.values())
+            self.loaded = True
+
+    def _replace(self, discord_id: int, key: SortKey) -> None:
+        old = self._by_id.get(discord_id)
+        if old == key:
+            return
+        if old is not None:
+            del self._keys[bisect.bisect_left(self._keys, old)]
+        bisect.insort(self._keys, key)
+        self._by_id[discord_id] = key
+
+    def upsert(
+        self,
+        discord_id: int,
+        solo_elo: int,
+        solo_wins: int,
+        solo_losses: int,
+        name: object = _KEEP,
+    ) -> None:
+        discord_id = int(discord_id)
+        with self._lock:
+            if name is _KEEP:
+                old = self._by_id.get(discord_id)
+                name = (old[3][1] if old[3][0] == 0 else None) if old else None
+            self._replace(discord_id, _sort_key(discord_id, solo_elo, solo_wins, solo_losses, name))
+
+    def apply_updates(self, updates: Iterable[Dict[str, int]]) -> None:
+        for update in updates:
+            self.upsert(
+                update["discord_id"],
+                update["solo_elo"],
+                update["solo_wins"],
+                update["solo_losses"],
+            )
+
+    def rank_of(self, discord_id: int) -> Optional[int]:
+        """Rang (1 = premier) du joueur, None s'il n'est pas classé."""
+        with self._lock:
+            key = self._by_id.get(int(discord_id))
+            if key is None:
+                return None
+            return bisect.bisect_left(self._keys, key) + 1
+
+    def get(self, discord_id: int) -> Optional[RankedPlayer]:
+        with self._lock:
+            key = self._by_id.get(int(discord_id))
+            if key is None:
+                return None
+            return _from_key(bisect.bisect_left(self._keys, key) + 1, key)
+
+    def slice(self, start_rank: int, count: int) -> List[RankedPlayer]:
+        """`count` joueurs à partir du rang `start_rank` (1-indexé)."""
+        start = max(0, int(start_rank) - 1)
+        with self._lock:
+            keys = self._keys[start : start + max(0, int(count))]
+        return [_from_key(start + offset + 1, key) for offset, key in enumerate(keys)]
+
+    def page(self, page: int, page_size: int) -> List[RankedPlayer]:
+        return self.slice((max(1, page) - 1) * page_size + 1, page_size)
+
+    def page_of(self, discord_id: int, page_size: int) -> Optional[int]:
+        rank = self.rank_of(discord_id)
+        return None if rank is None else (rank - 1) // page_size + 1
+
+    def around(self, discord_id: int, radius: int = 2) -> List[RankedPlayer]:
+        """Le joueur et ses `radius` voisins de chaque côté."""
+        rank = self.rank_of(discord_id)
+        if rank is None:
+            return []
+        start = max(1, rank - radius)
+        return self.slice(start, rank - start + radius + 1)
@@ -0,0 +1,76 @@
+"""Cache partagé des pages de classement rendues, indexé par version des ratings."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .database import LeaderboardPage
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    page: int
+    version: int
+    result: "LeaderboardPage"
+    lines: Tuple[str, ...]
+
+
+class LeaderboardPageCache:
+    """LRU de pages `(page, ratings_version)` partagé par toutes les vues `!lb`.
+
+    Une page n'est valable que pour la version des ratings sous laquelle elle
+    a été lue : `database.apply_player_updates` incrémente la version, les
+    anciennes pages ne sont donc plus jamais servies et sont purgées dès
+    qu'une page d'une version plus récente est stockée.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = max(0, int(maxsize))
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[int, int], CachedPage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, page: int, version: int) -> Optional[CachedPage]:
+        with self._lock:
+            entry = self._entries.get((page, version))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((page, version))
+            self.hits += 1
+            return entry
+
+    def put(self, entry: CachedPage) -> CachedPage:
+        if not self.maxsize:
+            return entry
+        with self._lock:
+            stale = [key for key in self._entries if key[1] < entry.version]
+            for key in stale:
+                del self._entries[key]
+            self._entries[(entry.page, entry.version)] = entry
+            self._entries.move_to_end((entry.page, entry.version))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
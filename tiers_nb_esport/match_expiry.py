@@ -0,0 +1,130 @@
+"""Expiration des matchs en attente : un seul planificateur pour tous les matchs."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import math
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Annule les matchs donnés et retourne le nombre de matchs réellement expirés.
+ExpireFn = Callable[[List[int]], Awaitable[int]]
+RETRY_DELAY = 60.0  # secondes avant de retenter une expiration échouée
+
+
+class MatchExpiryScheduler:
+    """Tas d'échéances `(deadline, match_id)` parcouru par une seule tâche.
+
+    Un match clos avant son échéance est simplement oublié (`discard`) : son
+    entrée reste dans le tas et est ignorée quand elle en sort. La tâche se
+    réveille sur une grille de `tick` secondes (au plus `tick` s de retard) :
+    toutes les échéances dépassées à ce moment sont transmises en un seul
+    appel à `on_expire`. Aucun match n'expire avant son échéance.
+    """
+
+    def __init__(self, ttl: float, tick: float = 5.0):
+        self.ttl = float(ttl)
+        self.tick = max(0.0, float(tick))
+        self._heap: List[Tuple[float, int]] = []
+        self._deadlines: Dict[int, float] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.expired = 0
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, match_id: object) -> bool:
+        return match_id in self._deadlines
+
+    def schedule(self, match_id: int, created_at: datetime) -> None:
+        deadline = created_at.timestamp() + self.ttl
+        if self._deadlines.get(match_id) == deadline:
+            return
+        self._deadlines[match_id] = deadline
+        heapq.heappush(self._heap, (deadline, match_id))
+        if self._heap[0] == (deadline, match_id):
+            self._wakeup.set()
+
+    def load(self, rows: Iterable[Tuple[int, datetime]]) -> int:
+        for match_id, created_at in rows:
+            self.schedule(int(match_id), created_at)
+        return len(self)
+
+    def discard(self, match_id: int) -> None:
+        self._deadlines.pop(match_id, None)
+
+    def next_deadline(self) -> Optional[float]:
+        # Purge paresseuse des matchs oubliés ou replanifiés.
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> List[int]:
+        due: List[int] = []
+        while True:
+            deadline = self.next_deadline()
+            if deadline is None or deadline > now:
+                return due
+            _, match_id = heapq.heappop(self._heap)
+            del self._deadlines[match_id]
+            due.append(match_id)
+
+    def start(self, on_expire: ExpireFn) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(on_expire))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, on_expire: ExpireFn) -> None:
+        while True:
+            self._wakeup.clear()
+            deadline = self.next_deadline()
+            if deadline is None:
+                await self._wakeup.wait()
+                continue
+            wake_at = deadline
+            if self.tick:
+                wake_at = math.ceil(deadline / self.tick) * self.tick
+            delay = wake_at - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            due = self.pop_due(time.time())
+            if not due:
+                continue
+            try:
+                self.expired += await on_expire(due)
+            except Exception:
+                # Les matchs restent `pending` en base : nouvel essai plus tard,
+                # sans boucler sur une base indisponible.
+                self.failed += len(due)
+                logger.exception("Expiration de %s match(s) échouée", len(due))
+                retry_at = time.time() + RETRY_DELAY
+                for match_id in due:
+                    self._deadlines.setdefault(match_id, retry_at)
+                    heapq.heappush(self._heap, (self._deadlines[match_id], match_id))
+
+    def stats(self) -> Dict[str, float]:
+        deadline = self.next_deadline()
+        return {
+            "scheduled": len(self._deadlines),
+            "expired": self.expired,
+            "failed": self.failed,
+            "next_in": max(0.0, deadline - time.time()) if deadline is not None else -1.0,
+        }
@@ -0,0 +1,102 @@
+"""Historique des matchs d'un joueur : pages par clé et cache LRU par joueur."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Curseur : (completed_at, match_id) de la dernière ligne de la page précédente.
+HistoryKey = Tuple[datetime, int]
+# Page en cache : (taille de page, curseur).
+PageKey = Tuple[int, Optional[HistoryKey]]
+
+
+@dataclass(frozen=True)
+class HistoryEntry:
+    match_id: int
+    completed_at: datetime
+    map_name: str
+    map_mode: str
+    map_emoji: Optional[str]
+    won: bool
+    elo_before: Optional[int]
+    elo_after: Optional[int]
+
+    @property
+    def delta(self) -> Optional[int]:
+        if self.elo_before is None or self.elo_after is None:
+            return None
+        return self.elo_after - self.elo_before
+
+    @property
+    def key(self) -> HistoryKey:
+        return (self.completed_at, self.match_id)
+
+
+@dataclass(frozen=True)
+class HistoryPage:
+    entries: List[HistoryEntry]
+    next_key: Optional[HistoryKey]  # None : plus de matchs plus anciens
+
+
+class HistoryCache:
+    """Pages d'historique par joueur, LRU sur les joueurs.
+
+    Toutes les pages d'un joueur sont invalidées ensemble quand un de ses
+    matchs se termine. Une page lue avant une invalidation n'est pas stockée
+    (`generation` relevé avant la requête), pour ne pas réinsérer une page
+    périmée.
+    """
+
+    def __init__(self, max_players: int = 500, max_pages: int = 10):
+        self.max_players = max(0, int(max_players))
+        self.max_pages = max(1, int(max_pages))
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._players: "OrderedDict[int, Dict[PageKey, HistoryPage]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, discord_id: int, page_key: PageKey) -> Optional[HistoryPage]:
+        with self._lock:
+            pages = self._players.get(discord_id)
+            page = pages.get(page_key) if pages is not None else None
+            if page is None:
+                self.misses += 1
+                return None
+            self._players.move_to_end(discord_id)
+            self.hits += 1
+            return page
+
+    def put(self, discord_id: int, page_key: PageKey, page: HistoryPage, generation: int) -> None:
+        if not self.max_players:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            pages = self._players.setdefault(discord_id, {})
+            if page_key not in pages and len(pages) >= self.max_pages:
+                return
+            pages[page_key] = page
+            self._players.move_to_end(discord_id)
+            while len(self._players) > self.max_players:
+                self._players.popitem(last=False)
+
+    def invalidate(self, discord_ids: Iterable[int]) -> None:
+        with self._lock:
+            self.generation += 1
+            for discord_id in discord_ids:
+                self._players.pop(int(discord_id), None)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "players": len(self._players),
+                "max_players": self.max_players,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
@@ -0,0 +1,134 @@
+"""Création des matchs en tâche de fond : étapes enchaînées par des files asyncio."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import discord
+
+from .database import Player
+from .elo_queue import QueueEntry
+from .queue_brackets import QueueBracket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LobbyJob:
+    """Un lobby sorti de sa file, complété étape par étape."""
+
+    guild: discord.Guild
+    bracket: QueueBracket
+    entries: List[QueueEntry]
+    dequeued_at: float = field(default_factory=time.monotonic)
+    players: List[Player] = field(default_factory=list)
+    team1_ids: List[int] = field(default_factory=list)
+    team2_ids: List[int] = field(default_factory=list)
+    map_info: Dict[str, str] = field(default_factory=dict)
+    match_record: Optional[Dict] = None
+
+    @property
+    def discord_ids(self) -> List[int]:
+        return [entry.discord_id for entry in self.entries]
+
+
+StageFn = Callable[[LobbyJob], Awaitable[None]]
+ErrorFn = Callable[[LobbyJob, str, BaseException], Awaitable[None]]
+DoneFn = Callable[[LobbyJob], None]
+
+
+class MatchPipeline:
+    """Étapes `(nom, fonction, workers)` reliées par des `asyncio.Queue`.
+
+    Chaque étape a ses propres workers : la persistance d'un match peut
+    avancer pendant que le suivant résout ses joueurs. Au plus `max_pending`
+    lobbies sont en cours en même temps ; au-delà, `free_slots()` vaut 0 et
+    les joueurs restent dans leur file (contre-pression). Un lobby dont une
+    étape échoue sort du pipeline via `on_error`, puis `on_done` est appelé
+    dans tous les cas.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Tuple[str, StageFn, int]],
+        on_error: ErrorFn,
+        on_done: DoneFn,
+        max_pending: int = 8,
+    ):
+        self.stages = list(stages)
+        self.on_error = on_error
+        self.on_done = on_done
+        self.max_pending = max(1, int(max_pending))
+        self._queues: List["asyncio.Queue[LobbyJob]"] = [
+            asyncio.Queue(maxsize=self.max_pending) for _ in self.stages
+        ]
+        self._tasks: List[asyncio.Task] = []
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+
+    def free_slots(self) -> int:
+        return max(0, self.max_pending - self.in_flight)
+
+    def submit(self, job: LobbyJob) -> None:
+        """À appeler après avoir vérifié `free_slots()` : la première file a toujours la place."""
+        self.in_flight += 1
+        self._queues[0].put_nowait(job)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        for index, (_, _, workers) in enumerate(self.stages):
+            for _ in range(max(1, int(workers))):
+                self._tasks.append(loop.create_task(self._worker(index)))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks.clear()
+
+    def _finish(self, job: LobbyJob) -> None:
+        self.in_flight -= 1
+        self.on_done(job)
+
+    async def _worker(self, index: int) -> None:
+        name, stage, _ = self.stages[index]
+        inbox = self._queues[index]
+        while True:
+            job = await inbox.get()
+            try:
+                await stage(job)
+            except Exception as exc:
+                self.failed += 1
+                try:
+                    await self.on_error(job, name, exc)
+                except Exception:
+                    logger.exception("Échec du traitement d'erreur de l'étape %s", name)
+                self._finish(job)
+                continue
+            finally:
+                inbox.task_done()
+            if index + 1 < len(self.stages):
+                await self._queues[index + 1].put(job)
+            else:
+                self.completed += 1
+                self._finish(job)
+
+    def stats(self) -> Dict[str, int]:
+        stats = {
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+        for (name, _, _), queue in zip(self.stages, self._queues):
+            stats[name] = queue.qsize()
+        return stats
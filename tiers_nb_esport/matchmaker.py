@@ -0,0 +1,285 @@
+"""Formation groupée des lobbies à partir de toute la file d'attente."""
+from __future__ import annotations
+
+import bisect
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from .elo_queue import QueueEntry
+
+
+@dataclass(frozen=True)
+class EloWindowCurve:
+    """Écart ELO accepté par un joueur en fonction de son attente.
+
+    fenêtre = base + growth_per_minute × (attente en minutes) ^ exponent,
+    plafonnée à `maximum`.
+    """
+
+    base: float
+    growth_per_minute: float
+    maximum: float
+    exponent: float = 1.0
+
+    def __call__(self, wait_seconds: float) -> float:
+        minutes = max(0.0, wait_seconds) / 60
+        return min(self.maximum, self.base + self.growth_per_minute * minutes ** self.exponent)
+
+    def reach(self, wait_seconds: float) -> float:
+        """Écart ELO de part et d'autre du joueur : `form_lobbies` borne l'écart
+        total du lobby par la fenêtre, soit ±fenêtre/2 autour de lui."""
+        return self(wait_seconds) / 2
+
+
+@dataclass(frozen=True)
+class Lobby:
+    entries: Tuple[QueueEntry, ...]
+
+    @property
+    def discord_ids(self) -> List[int]:
+        return [entry.discord_id for entry in self.entries]
+
+    @property
+    def spread(self) -> int:
+        elos = [entry.elo for entry in self.entries]
+        return max(elos) - min(elos)
+
+
+def _anchored_lobby(
+    anchor: int,
+    overdue: List[int],
+    fresh: List[int],
+    fresh_elos: List[int],
+    elos: Sequence[int],
+    waits: Sequence[float],
+    lobby_size: int,
+    allowed: Callable[[List[int], int], bool],
+) -> Optional[List[int]]:
+    """Meilleur lobby contenant `anchor` (indices dans l'ordre ELO).
+
+    Le lobby prend le plus de joueurs en retard possible : une suite
+    consécutive de `overdue` autour de l'ancre, complétée par une fenêtre
+    consécutive de `fresh`. À nombre égal de joueurs en retard, l'écart le
+    plus faible puis l'attente cumulée la plus longue l'emportent.
+    """
+    position = bisect.bisect_left(overdue, anchor)
+    for taken in range(min(lobby_size, len(overdue)), 0, -1):
+        fill = lobby_size - taken
+        if fill > len(fresh):
+            continue
+        best: Optional[Tuple[Tuple[int, float], List[int]]] = None
+        for start in range(max(0, position - taken + 1), min(position, len(overdue) - taken) + 1):
+            run = overdue[start : start + taken]
+            low, high = elos[run[0]], elos[run[-1]]
+            if fill:
+                first = max(0, bisect.bisect_left(fresh_elos, low) - fill)
+                last = min(len(fresh) - fill, bisect.bisect_right(fresh_elos, high))
+                choices = [fresh[offset : offset + fill] for offset in range(first, last + 1)]
+            else:
+                choices = [[]]
+            for fillers in choices:
+                members = run + fillers
+                spread = max(high, elos[fillers[-1]] if fillers else high) - min(
+                    low, elos[fillers[0]] if fillers else low
+                )
+                if not allowed(members, spread):
+                    continue
+                score = (-spread, sum(waits[index] for index in members))
+                if best is None or score > best[0]:
+                    best = (score, members)
+        if best is not None:
+            return sorted(best[1])
+    return None
+
+
+def _contiguous_lobbies(
+    ordered: Sequence[QueueEntry],
+    waits: Sequence[float],
+    lobby_size: int,
+    allowed: Callable[[List[int], int], bool],
+) -> List[Lobby]:
+    """Le plus de lobbies de joueurs consécutifs, d'écart cumulé minimal.
+
+    Une fois les joueurs triés par ELO, une solution d'écart minimal n'utilise
+    que des fenêtres de `lobby_size` joueurs consécutifs : échanger un joueur
+    laissé de côté au milieu d'une fenêtre contre une de ses extrémités ne
+    peut pas élargir l'écart. Programmation dynamique sur le préfixe trié ;
+    à nombre et écart égaux, l'attente cumulée la plus longue l'emporte.
+    """
+    wait_prefix = [0.0]
+    for wait in waits:
+        wait_prefix.append(wait_prefix[-1] + wait)
+
+    # best[i] : meilleur score sur les i premiers joueurs triés ;
+    # take[i] : vrai si le joueur i-1 clôt une fenêtre dans cette solution.
+    best: List[Tuple[int, int, float]] = [(0, 0, 0.0)]
+    take: List[bool] = [False]
+    for end in range(1, len(ordered) + 1):
+        candidate = best[end - 1]
+        took = False
+        start = end - lobby_size
+        if start >= 0:
+            spread = ordered[end - 1].elo - ordered[start].elo
+            if allowed(list(range(start, end)), spread):
+                previous = best[start]
+                span = (
+                    previous[0] + 1,
+                    previous[1] - spread,
+                    previous[2] + wait_prefix[end] - wait_prefix[start],
+                )
+                if span > candidate:
+                    candidate, took = span, True
+        best.append(candidate)
+        take.append(took)
+
+    lobbies: List[Lobby] = []
+    end = len(ordered)
+    while end > 0:
+        if take[end]:
+            lobbies.append(Lobby(tuple(ordered[end - lobby_size : end])))
+            end -= lobby_size
+        else:
+            end -= 1
+    lobbies.reverse()
+    return lobbies
+
+
+def form_lobbies(
+    entries: Sequence[QueueEntry],
+    lobby_size: int,
+    max_spread: Optional[int] = None,
+    fairness_wait: float = 0.0,
+    now: Optional[float] = None,
+    window: Optional[Callable[[float], float]] = None,
+) -> List[Lobby]:
+    """Forme les lobbies de la passe, joueurs en retard d'abord.
+
+    1. Les joueurs ayant attendu plus de `fairness_wait` s sont servis du
+       plus ancien au plus récent : chacun ancre un lobby qui prend le plus
+       de joueurs en retard possible et ne complète qu'ensuite avec des
+       joueurs récents. Un joueur récent ne prend donc jamais la place d'un
+       joueur en retard compatible.
+    2. Les joueurs restants forment le plus de lobbies possible en
+       minimisant l'écart ELO total (`_contiguous_lobbies`).
+
+    Un lobby n'est retenu que si son écart respecte `max_spread` et, avec
+    `window`, l'écart accepté par chacun de ses joueurs selon son attente.
+    """
+    if lobby_size <= 0 or len(entries) < lobby_size:
+        return []
+    now = time.monotonic() if now is None else now
+    ordered = sorted(entries, key=lambda entry: (entry.elo, entry.seq))
+    elos = [entry.elo for entry in ordered]
+    waits = [entry.wait_time(now) for entry in ordered]
+    accepted = [window(wait) for wait in waits] if window else None
+
+    def allowed(members: List[int], spread: int) -> bool:
+        if max_spread is not None and spread > max_spread:
+            return False
+        return accepted is None or all(spread <= accepted[index] for index in members)
+
+    lobbies: List[Lobby] = []
+    late = [fairness_wait > 0 and wait >= fairness_wait for wait in waits]
+    overdue = [index for index in range(len(ordered)) if late[index]]
+    fresh = [index for index in range(len(ordered)) if not late[index]]
+    fresh_elos = [elos[index] for index in fresh]
+    for anchor in sorted(overdue, key=lambda index: -waits[index]):
+        if len(overdue) + len(fresh) < lobby_size:
+            break
+        position = bisect.bisect_left(overdue, anchor)
+        if position == len(overdue) or overdue[position] != anchor:
+            continue  # déjà placé dans le lobby d'un joueur plus ancien
+        members = _anchored_lobby(
+            anchor, overdue, fresh, fresh_elos, elos, waits, lobby_size, allowed
+        )
+        if members is None:
+            continue
+        lobbies.append(Lobby(tuple(ordered[index] for index in members)))
+        for index in members:
+            pool = overdue if late[index] else fresh
+            position = bisect.bisect_left(pool, index)
+            if not late[index]:
+                del fresh_elos[position]
+            del pool[position]
+
+    remaining = sorted(overdue + fresh)
+
+    def remaining_allowed(members: List[int], spread: int) -> bool:
+        return allowed([remaining[index] for index in members], spread)
+
+    lobbies.extend(
+        _contiguous_lobbies(
+            [ordered[index] for index in remaining],
+            [waits[index] for index in remaining],
+            lobby_size,
+            remaining_allowed,
+        )
+    )
+    return lobbies
+
+
+class ArrivalRateEstimator:
+    """Débit d'arrivée en file par tranche d'ELO, estimé en ligne.
+
+    Chaque tranche garde un compteur à décroissance exponentielle : pour un
+    flux stable de λ arrivées/s, le compteur tend vers λ × `time_constant`.
+    """
+
+    def __init__(self, band_width: int = 100, time_constant: float = 1800.0):
+        self.band_width = max(1, int(band_width))
+        self.time_constant = max(1.0, float(time_constant))
+        self._bands: Dict[int, Tuple[float, float]] = {}
+
+    def _decayed(self, band: int, now: float) -> float:
+        count, updated_at = self._bands.get(band, (0.0, now))
+        return count * math.exp(-(now - updated_at) / self.time_constant)
+
+    def record(self, elo: int, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        band = int(elo) // self.band_width
+        self._bands[band] = (self._decayed(band, now) + 1.0, now)
+
+    def rate(self, low: float, high: float, now: Optional[float] = None) -> float:
+        """Arrivées par seconde dans les tranches couvrant [low, high]."""
+        now = time.monotonic() if now is None else now
+        first = int(low) // self.band_width
+        last = int(high) // self.band_width
+        count = sum(self._decayed(band, now) for band in self._bands if first <= band <= last)
+        return count / self.time_constant
+
+    def eta(
+        self, needed: int, low: float, high: float, now: Optional[float] = None
+    ) -> Optional[float]:
+        """Secondes estimées avant l'arrivée de `needed` joueurs (None si inconnu)."""
+        if needed <= 0:
+            return 0.0
+        rate = self.rate(low, high, now)
+        if rate <= 0:
+            return None
+        return needed / rate
+
+
+class WaitTimeStats:
+    """Temps d'attente avant match des derniers joueurs servis (médiane, p95)."""
+
+    def __init__(self, maxlen: int = 1000):
+        self._samples: Deque[float] = deque(maxlen=maxlen)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, wait_seconds: float) -> None:
+        self._samples.append(max(0.0, float(wait_seconds)))
+
+    def summary(self) -> Dict[str, float]:
+        if not self._samples:
+            return {"count": 0, "median": 0.0, "p95": 0.0}
+        ordered = sorted(self._samples)
+        return {
+            "count": len(ordered),
+            "median": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, math.ceil(len(ordered) * 0.95) - 1)],
+        }
@@ -5,51 +5,106 @@ import asyncio
 import logging
 import math
 import random
-from collections import Counter
-from typing import Dict, List, Optional
+import re
+from typing import Dict, List, Optional, Set
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 
-from . import config, database, elo_system
+from . import async_database, config, database, elo_system, matchmaker
 from .database import Player
+from .elo_queue import EloQueue, QueueEntry
+from .leaderboard_cache import CachedPage, LeaderboardPageCache
+from .match_expiry import MatchExpiryScheduler
+from .match_history import HistoryKey
+from .match_pipeline import LobbyJob, MatchPipeline
+from .outbound import LOW, OutboundScheduler
+from .queue_brackets import BracketRouter, QueueBracket
+from .tier_roles import TierRoleSync
+from .tiers import compute_tier_boundaries, get_tier_by_rank
+from .vote_store import MatchVoteState, VoteStore
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-queue_lock = asyncio.Lock()
-vote_lock = asyncio.Lock()
-solo_queue_1: List[int] = []
-solo_queue_2: List[int] = []
-match_votes: Dict[int, Dict[int, str]] = {}
+# Votes des matchs en cours, rechargés depuis la base au premier clic après un redémarrage.
+vote_store = VoteStore(stripes=config.VOTE_LOCK_STRIPES)
+# Envois et éditions hors réponses d'interaction : fusionnés et cadencés par salon.
+outbound = OutboundScheduler.from_config()
+# Échéances des matchs en attente, rechargées depuis `matches.created_at` au démarrage.
+match_expiry = MatchExpiryScheduler(
+    ttl=config.MATCH_EXPIRY_MINUTES * 60, tick=config.MATCH_EXPIRY_TICK
+)
 MAX_SERIES_WINS = 2
 LEADERBOARD_PAGE_SIZE = 10
+HISTORY_PAGE_SIZE = 10
+# Pages `!lb` rendues, partagées entre toutes les vues tant que les ratings ne changent pas.
+leaderboard_pages = LeaderboardPageCache(maxsize=config.LEADERBOARD_PAGE_CACHE_SIZE)
 
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix="!", intents=intents, help_command=None)
+class MatchmakingBot(commands.Bot):
+    async def setup_hook(self) -> None:
+        # Un seul gestionnaire pour les boutons de vote de tous les matchs.
+        self.add_dynamic_items(MatchVoteButton)
+        match_expiry.start(expire_pending_matches)
+        lobby_pipeline.start()
+
+
+bot = MatchmakingBot(command_prefix="!", intents=intents, help_command=None)
+
+elo_window = matchmaker.EloWindowCurve(
+    base=config.QUEUE_MAX_ELO_DIFF,
+    growth_per_minute=config.QUEUE_ELO_WINDOW_GROWTH,
+    maximum=config.QUEUE_ELO_WINDOW_MAX,
+    exponent=config.QUEUE_ELO_WINDOW_EXPONENT,
+)
+arrival_estimator = matchmaker.ArrivalRateEstimator(
+    band_width=config.ARRIVAL_BAND_WIDTH,
+    time_constant=config.ARRIVAL_RATE_TIME_CONSTANT,
+)
+wait_stats = matchmaker.WaitTimeStats()
+# Une file et un verrou par tranche d'ELO : un !join dans une file
+# n'attend jamais un !join ou une passe de matchmaking d'une autre file.
+queue_brackets = BracketRouter.from_config()
+# Joueurs sortis de leur file dont le match est en cours de création (pipeline).
+players_in_creation: Set[int] = set()
+# Rôles de tier : seuls les joueurs qui changent de tier sont modifiés.
+tier_roles = TierRoleSync.from_config()
 
 
 def get_queue_number_for_elo(elo: int) -> int:
-    return 2 if elo >= config.QUEUE_OR_1_MIN_ELO else 1
+    return queue_brackets.for_elo(elo).number
 
 
-def get_queue_for_elo(elo: int) -> List[int]:
-    return solo_queue_2 if get_queue_number_for_elo(elo) == 2 else solo_queue_1
+def get_queue_for_elo(elo: int) -> EloQueue:
+    return queue_brackets.for_elo(elo).queue
 
 
-def is_elo_compatible_for_queue(player_elo: int, queued_players: List[Player]) -> bool:
-    if not queued_players:
-        return True
+def estimate_queue_eta(queue: EloQueue, entry: Optional[QueueEntry] = None) -> Optional[float]:
+    """Attente estimée (s) avant le prochain match de la file ou d'un joueur donné."""
+    if entry is not None:
+        reach = elo_window.reach(entry.wait_time())
+        low, high = entry.elo - reach, entry.elo + reach
+        needed = config.QUEUE_TARGET_SIZE - len(queue.in_elo_range(int(low), int(high)))
+    else:
+        bounds = queue.elo_range()
+        if bounds is None:
+            return None
+        reach = elo_window.reach(0)
+        low, high = bounds[0] - reach, bounds[1] + reach
+        needed = config.QUEUE_TARGET_SIZE - len(queue)
+    return arrival_estimator.eta(needed, low, high)
 
-    queue_elos = [queued_player.solo_elo for queued_player in queued_players]
-    min_elo = min(queue_elos)
-    max_elo = max(queue_elos)
-    max_diff = config.QUEUE_MAX_ELO_DIFF
 
-    return abs(player_elo - min_elo) <= max_diff and abs(player_elo - max_elo) <= max_diff
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "inconnue"
+    if seconds < 60:
+        return "< 1 min"
+    return f"~{round(seconds / 60)} min"
 
 
 def format_player_winrate(player: Player) -> str:
@@ -59,213 +114,308 @@ def format_player_winrate(player: Player) -> str:
     return f"{(player.solo_wins / total) * 100:.1f}%"
 
 
-class MatchVoteView(discord.ui.View):
-    """Interface de vote pour un match."""
-
-    def __init__(
-        self,
-        match_id: int,
-        match_record: Dict,
-        team1_players: List[Player],
-        team2_players: List[Player],
-    ):
-        super().__init__(timeout=3600)
+VOTE_BUTTONS = {
+    "bleue": ("Victoire bleue", discord.ButtonStyle.primary, "🔵"),
+    "rouge": ("Victoire rouge", discord.ButtonStyle.danger, "🔴"),
+    "annulee": ("Match annulé", discord.ButtonStyle.secondary, "⚪"),
+}
+VOTE_LABELS = {"bleue": "🔵 Bleue", "rouge": "🔴 Rouge", "annulee": "⚪ Annulé"}
+
+
+class MatchVoteButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"match:(?P<match_id>[0-9]+):(?P<label>bleue|rouge|annulee)",
+):
+    """Bouton de vote persistant : tout l'état utile est dans le custom_id.
+
+    Enregistré une seule fois (`setup_hook`), il répond aussi aux messages
+    envoyés avant un redémarrage.
+    """
+
+    def __init__(self, match_id: int, label: str, disabled: bool = False):
+        text, style, emoji = VOTE_BUTTONS[label]
+        super().__init__(
+            discord.ui.Button(
+                label=text,
+                style=style,
+                emoji=emoji,
+                custom_id=f"match:{match_id}:{label}",
+                disabled=disabled,
+            )
+        )
         self.match_id = match_id
-        self.team1_ids = list(match_record["team1_ids"])
-        self.team2_ids = list(match_record["team2_ids"])
-        self.team1_players = team1_players
-        self.team2_players = team2_players
-        self.team1_score = int(match_record.get("team1_score", 0))
-        self.team2_score = int(match_record.get("team2_score", 0))
-        self.match_record = dict(match_record)
-        self.message: Optional[discord.Message] = None
+        self.label = label
+
+    @classmethod
+    async def from_custom_id(
+        cls, interaction: discord.Interaction, item: discord.ui.Button, match: re.Match[str]
+    ) -> "MatchVoteButton":
+        return cls(int(match["match_id"]), match["label"])
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        await register_vote(interaction, self.match_id, self.label)
+
+
+def build_vote_view(match_id: int, disabled: bool = False) -> discord.ui.View:
+    """Composants du message de match.
+
+    La View est arrêtée avant l'envoi : discord.py ne la garde alors pas en
+    mémoire, les clics sont routés par `MatchVoteButton` via le custom_id.
+    """
+    view = discord.ui.View(timeout=None)
+    for label in VOTE_BUTTONS:
+        view.add_item(MatchVoteButton(match_id, label, disabled=disabled))
+    view.stop()
+    return view
+
+
+async def _load_vote_state(match_id: int) -> Optional[MatchVoteState]:
+    loaded = await async_database.load_vote_state(match_id)
+    if loaded is None:
+        return None
+    match, votes = loaded
+    return vote_store.put(MatchVoteState.from_rows(match, votes))
 
-    async def on_timeout(self) -> None:
-        match_votes.pop(self.match_id, None)
-        self.disable_all_items()
-        if self.message:
-            await self.message.edit(view=self)
-            # UX #3 : notifier explicitement l'expiration dans le canal
-            # plutôt que de désactiver les boutons silencieusement.
-            try:
-                await self.message.channel.send(
-                    f"⏱️ Le match **#{self.match_id}** a expiré sans résultat validé "
-                    f"(aucune majorité atteinte en 1h). Le match est annulé."
-                )
-            except Exception:
-                pass
-        self.stop()
 
-    async def _register_vote(self, interaction: discord.Interaction, label: str) -> None:
-        voter_id = interaction.user.id
-        if voter_id not in self.team1_ids + self.team2_ids:
+async def _refresh_match_message(message: Optional[discord.Message], match_record: Dict) -> None:
+    if message is None:
+        return
+    players = await async_database.fetch_players(
+        list(match_record["team1_ids"]) + list(match_record["team2_ids"])
+    )
+    team1_players = [players[pid] for pid in match_record["team1_ids"] if pid in players]
+    team2_players = [players[pid] for pid in match_record["team2_ids"] if pid in players]
+    embed = build_match_embed(match_record, team1_players, team2_players)
+    outbound.edit(message, embed=embed, view=build_vote_view(match_record["id"]))
+
+
+async def _finish_match(interaction: discord.Interaction, match_id: int, label: str) -> None:
+    try:
+        match_summary = await async_database.run_sync(
+            elo_system.finalize_match_result,
+            match_id,
+            label,
+            interaction.guild,
+            database,
+        )
+    finally:
+        # En cas d'échec, le clic suivant recharge l'état depuis la base (match encore `pending`).
+        vote_store.discard(match_id)
+    if match_summary is None:
+        # Match resté `pending` (rien à régler) : son échéance reste planifiée.
+        return
+    match_expiry.discard(match_id)
+    channel = interaction.channel or interaction.user.dm_channel
+    if channel:
+        outbound.send(channel, content=match_summary)
+    if interaction.message:
+        outbound.edit(interaction.message, view=build_vote_view(match_id, disabled=True))
+
+
+async def expire_pending_matches(match_ids: List[int]) -> int:
+    """Annule les matchs arrivés à échéance (appelé par `match_expiry`, une fois par tick).
+
+    Retourne le nombre de matchs réellement annulés (ceux encore `pending`).
+    """
+    expired = await async_database.expire_matches(match_ids)
+    for match in expired:
+        match_id = int(match["id"])
+        vote_store.discard(match_id)
+        if not match.get("channel_id") or not match.get("message_id"):
+            continue
+        channel = bot.get_partial_messageable(int(match["channel_id"]))
+        outbound.edit(
+            channel.get_partial_message(int(match["message_id"])),
+            view=build_vote_view(match_id, disabled=True),
+        )
+        # UX #3 : notifier explicitement l'expiration dans le canal
+        # plutôt que de désactiver les boutons silencieusement.
+        outbound.send(
+            channel,
+            content=(
+                f"⏱️ Le match **#{match_id}** a expiré sans résultat validé "
+                f"(aucune majorité atteinte en {config.MATCH_EXPIRY_MINUTES:g} min). "
+                "Le match est annulé."
+            ),
+        )
+    if expired:
+        logger.info("%s match(s) expiré(s) annulé(s)", len(expired))
+    return len(expired)
+
+
+async def register_vote(interaction: discord.Interaction, match_id: int, label: str) -> None:
+    voter_id = interaction.user.id
+    series_summary: Optional[str] = None
+    updated_match: Optional[Dict] = None
+    finished = False
+    # Verrou propre au match (partagé par rayure) : les votes d'autres matchs ne l'attendent pas.
+    async with vote_store.lock(match_id):
+        state = vote_store.get(match_id) or await _load_vote_state(match_id)
+        if state is None or state.closed:
+            await interaction.response.send_message(
+                f"Le match #{match_id} est déjà terminé.", ephemeral=True
+            )
+            return
+        if voter_id not in state.voters:
             await interaction.response.send_message(
                 "Seuls les joueurs du match peuvent voter.", ephemeral=True
             )
             return
-
-        async with vote_lock:
-            votes = match_votes.setdefault(self.match_id, {})
-            # SEC #2 : un vote soumis est définitif — on interdit le changement.
-            # Sans ce guard, un joueur pourrait flipper son vote au dernier moment
-            # pour manipuler le résultat juste avant la majorité.
-            if voter_id in votes:
-                await interaction.response.send_message(
-                    "Tu as déjà voté pour ce match. Le vote est définitif.", ephemeral=True
-                )
-                return
-            votes[voter_id] = label
-            counts = Counter(votes.values())
-
-        unique_players = set(self.team1_ids + self.team2_ids)
-        total_players = len(unique_players)
-        if total_players < 2:
-            total_players = max(len(self.team1_ids) + len(self.team2_ids), 2)
-        majority = total_players // 2 + 1
-        top_vote: Optional[str] = None
-        top_count = 0
-        if counts:
-            top_vote, top_count = counts.most_common(1)[0]
-
-        series_summary: Optional[str] = None
-
-        if top_vote and top_count >= majority:
-            if top_vote == "annulee":
-                match_summary = elo_system.finalize_match_result(
-                    self.match_id, top_vote, interaction.guild, database
-                )
-                if match_summary:
-                    channel = interaction.channel or interaction.user.dm_channel
-                    if channel:
-                        await channel.send(match_summary)
-                match_votes.pop(self.match_id, None)
-                self.disable_all_items()
-                if self.message:
-                    await self.message.edit(view=self)
-                self.stop()
-            else:
-                if top_vote == "bleue":
-                    self.team1_score += 1
-                else:
-                    self.team2_score += 1
-
-                self.match_record["team1_score"] = self.team1_score
-                self.match_record["team2_score"] = self.team2_score
-
-                if self.team1_score >= MAX_SERIES_WINS or self.team2_score >= MAX_SERIES_WINS:
-                    updated_match = database.update_match_series_score(
-                        self.match_id, self.team1_score, self.team2_score
-                    )
-                    if updated_match:
-                        self.match_record.update(updated_match)
-                        await self._refresh_message(updated_match)
-                    else:
-                        await self._refresh_message(self.match_record)
-                    match_summary = elo_system.finalize_match_result(
-                        self.match_id, top_vote, interaction.guild, database
-                    )
-                    if match_summary:
-                        channel = interaction.channel or interaction.user.dm_channel
-                        if channel:
-                            await channel.send(match_summary)
-                    match_votes.pop(self.match_id, None)
-                    self.disable_all_items()
-                    if self.message:
-                        await self.message.edit(view=self)
-                    self.stop()
-                else:
-                    async with vote_lock:
-                        match_votes[self.match_id] = {}
-                    team_label = "bleue" if top_vote == "bleue" else "rouge"
-                    series_summary = (
-                        f"Manche remportée par l'équipe {team_label}. "
-                        f"Score actuel : {self.team1_score}-{self.team2_score}."
-                    )
-                    await self._refresh_message(self.match_record)
-
-        # UX #2 : afficher le décompte de votes en temps réel dans l'embed du match.
-        # On relit les votes actuels (hors lock, lecture seule) pour construire le résumé.
-        current_votes = match_votes.get(self.match_id, {})
-        current_counts = Counter(current_votes.values())
-        vote_lines: List[str] = []
-        label_map = {"bleue": "🔵 Bleue", "rouge": "🔴 Rouge", "annulee": "⚪ Annulé"}
-        for vote_key, vote_label in label_map.items():
-            n = current_counts.get(vote_key, 0)
-            if n:
-                vote_lines.append(f"{vote_label} : {n} vote{'s' if n > 1 else ''}")
-        votes_cast = len(current_votes)
-        total_voters = len(set(self.team1_ids + self.team2_ids))
-        vote_summary = (
-            f"Votes ({votes_cast}/{total_voters}) : " + " — ".join(vote_lines)
-            if vote_lines
-            else f"En attente des votes (0/{total_voters})"
-        )
-        await interaction.response.send_message(
-            f"✅ Vote enregistré pour **{label_map.get(label, label)}**.\n{vote_summary}",
-            ephemeral=True,
-        )
-
-        if series_summary and interaction.channel:
-            await interaction.channel.send(series_summary)
-
-    async def _refresh_message(self, match_record: Dict) -> None:
-        if not self.message:
+        # SEC #2 : un vote soumis est définitif — on interdit le changement.
+        # Sans ce guard, un joueur pourrait flipper son vote au dernier moment
+        # pour manipuler le résultat juste avant la majorité.
+        if voter_id in state.votes or not await async_database.record_vote(
+            match_id, voter_id, label
+        ):
+            await interaction.response.send_message(
+                "Tu as déjà voté pour ce match. Le vote est définitif.", ephemeral=True
+            )
             return
-        embed = build_match_embed(match_record, self.team1_players, self.team2_players)
-        await self.message.edit(embed=embed, view=self)
-
-    @discord.ui.button(label="Victoire bleue", style=discord.ButtonStyle.primary, emoji="🔵")
-    async def vote_blue(
-        self, interaction: discord.Interaction, button: discord.ui.Button
-    ) -> None:
-        await self._register_vote(interaction, "bleue")
+        decided = state.add_vote(voter_id, label)
+        if decided == "annulee":
+            finished = True
+            # Fermé avant de relâcher le verrou : `_finish_match` tourne hors verrou.
+            state.closed = True
+        elif decided:
+            updated_match = await async_database.close_vote_round(match_id, decided)
+            if updated_match:
+                state.team1_score = int(updated_match["team1_score"])
+                state.team2_score = int(updated_match["team2_score"])
+            state.clear_votes()
+            finished = (
+                state.team1_score >= MAX_SERIES_WINS or state.team2_score >= MAX_SERIES_WINS
+            )
+            # Série décidée : les clics arrivant pendant la finalisation sont refusés.
+            state.closed = finished
+        current_counts = dict(state.counts)
+        votes_cast = len(state.votes)
+
+    if updated_match:
+        await _refresh_match_message(interaction.message, updated_match)
+        if not finished:
+            series_summary = (
+                f"Manche remportée par l'équipe {decided}. "
+                f"Score actuel : {state.team1_score}-{state.team2_score}."
+            )
+    if finished:
+        await _finish_match(interaction, match_id, decided)
+
+    # UX #2 : afficher le décompte de votes en temps réel dans l'embed du match.
+    vote_lines: List[str] = []
+    for vote_key, vote_label in VOTE_LABELS.items():
+        n = current_counts.get(vote_key, 0)
+        if n:
+            vote_lines.append(f"{vote_label} : {n} vote{'s' if n > 1 else ''}")
+    total_voters = len(state.voters)
+    vote_summary = (
+        f"Votes ({votes_cast}/{total_voters}) : " + " — ".join(vote_lines)
+        if vote_lines
+        else f"En attente des votes (0/{total_voters})"
+    )
+    await interaction.response.send_message(
+        f"✅ Vote enregistré pour **{VOTE_LABELS.get(label, label)}**.\n{vote_summary}",
+        ephemeral=True,
+    )
 
-    @discord.ui.button(label="Victoire rouge", style=discord.ButtonStyle.danger, emoji="🔴")
-    async def vote_red(
-        self, interaction: discord.Interaction, button: discord.ui.Button
-    ) -> None:
-        await self._register_vote(interaction, "rouge")
+    if series_summary and interaction.channel:
+        outbound.send(interaction.channel, content=series_summary)
 
-    @discord.ui.button(label="Match annulé", style=discord.ButtonStyle.secondary, emoji="⚪")
-    async def vote_cancel(
-        self, interaction: discord.Interaction, button: discord.ui.Button
-    ) -> None:
-        await self._register_vote(interaction, "annulee")
 
+class AuthorPaginationView(discord.ui.View):
+    """Vue de pagination dont seuls les boutons de l'auteur de la commande répondent."""
 
-class LeaderboardPaginationView(discord.ui.View):
     def __init__(self, ctx: commands.Context):
         super().__init__(timeout=180)
         self.ctx = ctx
-        self.page = 1
         self.message: Optional[discord.Message] = None
+
+    async def _guard(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.ctx.author.id:
+            await interaction.response.send_message(
+                "Seul l'auteur de la commande peut utiliser ces boutons.", ephemeral=True
+            )
+            return False
+        return True
+
+
+class LeaderboardPaginationView(AuthorPaginationView):
+    def __init__(
+        self,
+        ctx: commands.Context,
+        start_page: int = 1,
+        start_after: Optional[database.LeaderboardKey] = None,
+    ):
+        super().__init__(ctx)
+        self.page = start_page
+        self.start_after = start_after
+        # Pagination par clé : on garde la première et la dernière ligne affichées
+        # pour demander la page voisine, sans OFFSET.
+        self._first_key: Optional[database.LeaderboardKey] = None
+        self._last_key: Optional[database.LeaderboardKey] = None
         # PERF #5 : Cache des tier boundaries — calculé une fois, réutilisé à chaque page.
         # total_players ne change pas entre deux clics de pagination dans la même session.
         self._cached_total: Optional[int] = None
         self._cached_boundaries: Optional[List[Dict]] = None
+        # Version des ratings sous laquelle les curseurs ont été lus.
+        self._cursor_version = database.ratings_version()
 
     async def on_timeout(self) -> None:
         self.disable_all_items()
         if self.message:
-            await self.message.edit(view=self)
+            outbound.edit(self.message, view=self)
 
-    async def _render(self) -> discord.Embed:
-        players, total_players = database.fetch_leaderboard_page(
-            LEADERBOARD_PAGE_SIZE, (self.page - 1) * LEADERBOARD_PAGE_SIZE
-        )
-        total_pages = max(1, math.ceil(total_players / LEADERBOARD_PAGE_SIZE))
-        self.page = max(1, min(self.page, total_pages))
+    async def _render(
+        self,
+        after: Optional[database.LeaderboardKey] = None,
+        before: Optional[database.LeaderboardKey] = None,
+    ) -> discord.Embed:
+        version = database.ratings_version()
+        cached = leaderboard_pages.get(self.page, version)
+        if cached is None:
+            cached = await self._load_page(after, before, version)
+        result = cached.result
+        total_players = result.total_players
+        self._first_key, self._last_key = result.first_key, result.last_key
+        self._cursor_version = cached.version
+        self.previous.disabled = not result.has_previous
+        self.next.disabled = not result.has_next
+        total_pages = max(1, math.ceil(total_players / LEADERBOARD_PAGE_SIZE), self.page)
 
         embed = discord.Embed(
             title="Classement",
             colour=discord.Colour(config.EMBED_COLOR),
         )
 
-        if not players:
+        if not result.players:
             embed.description = "Aucun joueur n'est encore classé."
             embed.set_footer(text="Page 1/1")
             return embed
 
+        embed.description = "\n".join(cached.lines)
+        embed.set_footer(text=f"Page {self.page}/{total_pages} • {total_players} joueurs")
+        return embed
+
+    async def _load_page(
+        self,
+        after: Optional[database.LeaderboardKey],
+        before: Optional[database.LeaderboardKey],
+        version: int,
+    ) -> CachedPage:
+        # Un curseur lu sous une version antérieure ne garantit plus que la page
+        # lue soit exactement la page `self.page` : elle est affichée sans être partagée.
+        cursor_valid = (after is None and before is None) or self._cursor_version == version
+        result = await async_database.fetch_leaderboard_keyset(
+            LEADERBOARD_PAGE_SIZE, after=after, before=before
+        )
+        if not result.players and (after or before):
+            # Le classement a bougé sous le curseur : on repart de la première page.
+            result = await async_database.fetch_leaderboard_keyset(LEADERBOARD_PAGE_SIZE)
+            self.page = 1
+            cursor_valid = True
+        if not result.has_previous:
+            self.page = 1
+        total_players = result.total_players
+
         # PERF #5 : on ne recalcule les boundaries que si le total a changé
         if self._cached_total != total_players or self._cached_boundaries is None:
             self._cached_total = total_players
@@ -274,7 +424,7 @@ class LeaderboardPaginationView(discord.ui.View):
         boundaries = self._cached_boundaries
         lines: List[str] = []
         start_rank = (self.page - 1) * LEADERBOARD_PAGE_SIZE + 1
-        for index, player in enumerate(players, start=start_rank):
+        for index, player in enumerate(result.players, start=start_rank):
             member = self.ctx.guild.get_member(player.discord_id)
             name = member.display_name if member else player.name
             tier = get_tier_by_rank(index, boundaries) or "Sans tier"
@@ -286,24 +436,17 @@ class LeaderboardPaginationView(discord.ui.View):
                 f"{player.solo_wins}V/{player.solo_losses}D — WR {wr} — Tier {tier}"
             )
 
-        embed.description = "\n".join(lines)
-        embed.set_footer(text=f"Page {self.page}/{total_pages} • {total_players} joueurs")
-        return embed
-
-    async def _guard(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.ctx.author.id:
-            await interaction.response.send_message(
-                "Seul l'auteur de la commande peut utiliser ces boutons.", ephemeral=True
-            )
-            return False
-        return True
+        page = CachedPage(self.page, version, result, tuple(lines))
+        if cursor_valid and database.ratings_version() == version:
+            leaderboard_pages.put(page)
+        return page
 
     @discord.ui.button(label="Précédent", style=discord.ButtonStyle.secondary, emoji="⬅️")
     async def previous(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
         if not await self._guard(interaction):
             return
         self.page = max(1, self.page - 1)
-        embed = await self._render()
+        embed = await self._render(before=self._first_key)
         await interaction.response.edit_message(embed=embed, view=self)
 
     @discord.ui.button(label="Suivant", style=discord.ButtonStyle.secondary, emoji="➡️")
@@ -311,6 +454,75 @@ class LeaderboardPaginationView(discord.ui.View):
         if not await self._guard(interaction):
             return
         self.page += 1
+        embed = await self._render(after=self._last_key)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+
+class HistoryPaginationView(AuthorPaginationView):
+    """Derniers matchs d'un joueur, du plus récent au plus ancien."""
+
+    def __init__(self, ctx: commands.Context, target: discord.abc.User):
+        super().__init__(ctx)
+        self.target = target
+        # Curseur de début de chaque page déjà vue : « Plus récents » y revient sans requête.
+        self._cursors: List[Optional[HistoryKey]] = [None]
+        self._next_key: Optional[HistoryKey] = None
+
+    async def on_timeout(self) -> None:
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            outbound.edit(self.message, view=self)
+
+    async def _render(self) -> discord.Embed:
+        page = await async_database.fetch_player_history(
+            self.target.id, HISTORY_PAGE_SIZE, self._cursors[-1]
+        )
+        self._next_key = page.next_key
+        self.newer.disabled = len(self._cursors) <= 1
+        self.older.disabled = page.next_key is None
+
+        embed = discord.Embed(
+            title=f"Historique de {self.target.display_name}",
+            colour=discord.Colour(config.EMBED_COLOR),
+        )
+        if not page.entries:
+            embed.description = "Aucun match terminé."
+            return embed
+
+        lines: List[str] = []
+        for entry in page.entries:
+            result = "✅ Victoire" if entry.won else "❌ Défaite"
+            delta = entry.delta
+            elo = (
+                f"{'+' if delta >= 0 else ''}{delta} → {entry.elo_after}"
+                if delta is not None
+                else "ELO n/c"
+            )
+            lines.append(
+                f"**#{entry.match_id}** {entry.map_emoji or '🗺️'} {entry.map_name} "
+                f"({entry.map_mode}) — {result} — {elo} — "
+                f"{discord.utils.format_dt(entry.completed_at, 'R')}"
+            )
+        embed.description = "\n".join(lines)
+        embed.set_footer(text=f"Page {len(self._cursors)}")
+        return embed
+
+    @discord.ui.button(label="Plus récents", style=discord.ButtonStyle.secondary, emoji="⬅️")
+    async def newer(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        if not await self._guard(interaction):
+            return
+        if len(self._cursors) > 1:
+            self._cursors.pop()
+        embed = await self._render()
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="Plus anciens", style=discord.ButtonStyle.secondary, emoji="➡️")
+    async def older(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        if not await self._guard(interaction):
+            return
+        if self._next_key is not None:
+            self._cursors.append(self._next_key)
         embed = await self._render()
         await interaction.response.edit_message(embed=embed, view=self)
 
@@ -328,13 +540,19 @@ async def send_match_message(
 
     embed = build_match_embed(match_record, team1_players, team2_players)
 
-    view = MatchVoteView(match_record["id"], match_record, team1_players, team2_players)
-    message = await channel.send(embed=embed, view=view)
-    view.message = message
+    message = await outbound.send(
+        channel, embed=embed, view=build_vote_view(match_record["id"])
+    )
+    if message is not None:
+        await async_database.set_match_message(match_record["id"], channel.id, message.id)
 
     log_channel = guild.get_channel(config.LOG_CHANNEL_ID)
     if log_channel and log_channel != channel:
-        await log_channel.send(f"Match #{match_record['id']} créé dans {channel.mention}")
+        outbound.send(
+            log_channel,
+            priority=LOW,
+            content=f"Match #{match_record['id']} créé dans {channel.mention}",
+        )
 
 
 def build_match_embed(
@@ -369,94 +587,132 @@ def _select_map() -> Dict[str, str]:
     return {"mode": mode["mode"], "map": map_name, "emoji": mode.get("emoji", "🗺️")}
 
 
-async def create_match_for_queue(guild: discord.Guild, queue: List[int]) -> None:
-    async with queue_lock:
-        if len(queue) < config.QUEUE_TARGET_SIZE:
-            return
-        selected_ids = [queue.pop(0) for _ in range(config.QUEUE_TARGET_SIZE)]
-
-    players_map = database.fetch_players(selected_ids)
-
-    resolved_players: List[Player] = []
-    for discord_id in selected_ids:
-        player = players_map.get(discord_id)
-        if not player:
-            member = guild.get_member(discord_id)
-            display_name = member.display_name if member else f"Joueur {discord_id}"
-            player = database.ensure_player(discord_id, display_name)
-        resolved_players.append(player)
+async def _resolve_lobby(job: LobbyJob) -> None:
+    # Une seule requête pour tout le lobby (aucune si les joueurs sont en cache et à jour).
+    entries = []
+    for discord_id in job.discord_ids:
+        member = job.guild.get_member(discord_id)
+        entries.append((discord_id, member.display_name if member else None))
+    players_map = await async_database.ensure_players(entries)
+    job.players = [players_map[discord_id] for discord_id in job.discord_ids]
 
-    team1_ids, team2_ids = elo_system.balance_teams(resolved_players)
-    team1_players = [p for p in resolved_players if p.discord_id in team1_ids]
-    team2_players = [p for p in resolved_players if p.discord_id in team2_ids]
 
-    map_info = _select_map()
-    match_record = database.record_match(team1_ids, team2_ids, map_info)
-    await send_match_message(guild, match_record, team1_players, team2_players)
+async def _balance_lobby(job: LobbyJob) -> None:
+    job.team1_ids, job.team2_ids = elo_system.balance_teams(job.players)
+    job.map_info = _select_map()
 
 
-async def create_match_if_possible(guild: discord.Guild) -> None:
-    await create_match_for_queue(guild, solo_queue_1)
-    await create_match_for_queue(guild, solo_queue_2)
-
+async def _persist_lobby(job: LobbyJob) -> None:
+    job.match_record = await async_database.record_match(job.team1_ids, job.team2_ids, job.map_info)
+    match_expiry.schedule(job.match_record["id"], job.match_record["created_at"])
+    for entry in job.entries:
+        wait_stats.record(entry.wait_time(job.dequeued_at))
 
-def compute_tier_boundaries(total_players: int) -> List[Dict[str, int]]:
-    if total_players <= 0:
-        return []
 
-    remaining = total_players
-    boundaries: List[Dict[str, int]] = []
+async def _announce_lobby(job: LobbyJob) -> None:
+    team1_players = [p for p in job.players if p.discord_id in job.team1_ids]
+    team2_players = [p for p in job.players if p.discord_id in job.team2_ids]
+    await send_match_message(job.guild, job.match_record, team1_players, team2_players)
 
-    for index, distribution in enumerate(config.TIER_DISTRIBUTION):
-        if remaining <= 0:
-            break
 
-        ratio = float(distribution.get("ratio", 0) or 0)
-        min_count = int(distribution.get("minCount", 0) or 0)
-        future_min = sum(
-            int(next_dist.get("minCount", 0) or 0)
-            for next_dist in config.TIER_DISTRIBUTION[index + 1 :]
+async def _lobby_failed(job: LobbyJob, stage: str, error: BaseException) -> None:
+    logger.error("Création de match échouée à l'étape %s", stage, exc_info=error)
+    if job.match_record is not None:
+        # Match déjà enregistré : il reste votable ou expirera, les joueurs ne reviennent pas en file.
+        return
+    async with job.bracket.lock:
+        restored = queue_brackets.requeue(job.bracket, job.entries)
+    logger.info("%s joueur(s) remis en file #%s", len(restored), job.bracket.number)
+
+
+def _lobby_done(job: LobbyJob) -> None:
+    players_in_creation.difference_update(job.discord_ids)
+
+
+# Création des matchs hors des commandes : `!join` rend la main dès le lobby formé.
+lobby_pipeline = MatchPipeline(
+    [
+        ("resolve", _resolve_lobby, config.MATCH_PIPELINE_WORKERS),
+        ("balance", _balance_lobby, 1),
+        ("persist", _persist_lobby, config.MATCH_PIPELINE_WORKERS),
+        ("announce", _announce_lobby, config.MATCH_PIPELINE_WORKERS),
+    ],
+    on_error=_lobby_failed,
+    on_done=_lobby_done,
+    max_pending=config.MATCH_PIPELINE_MAX_PENDING,
+)
+
+
+async def create_match_for_queue(guild: discord.Guild, bracket: QueueBracket) -> None:
+    """Forme en une passe les lobbies possibles et les confie au pipeline de création."""
+    async with bracket.lock:
+        slots = lobby_pipeline.free_slots()
+        if not slots:
+            # Pipeline plein : les joueurs attendent en file la passe suivante.
+            return
+        lobbies = matchmaker.form_lobbies(
+            bracket.queue.entries(),
+            config.QUEUE_TARGET_SIZE,
+            fairness_wait=config.MATCHMAKING_FAIRNESS_WAIT,
+            window=elo_window,
         )
+        for lobby in lobbies[:slots]:
+            entries = queue_brackets.dequeue(bracket, lobby.discord_ids)
+            players_in_creation.update(entry.discord_id for entry in entries)
+            lobby_pipeline.submit(LobbyJob(guild, bracket, entries))
 
-        if index == len(config.TIER_DISTRIBUTION) - 1:
-            count = remaining
-        else:
-            count = int(total_players * ratio)
-            if count < min_count:
-                count = min_count
-            max_allowed = remaining - future_min
-            if max_allowed < 0:
-                max_allowed = 0
-            if count > max_allowed:
-                count = max(min_count, max_allowed)
-
-        if count > remaining:
-            count = remaining
-
-        if count <= 0:
-            continue
 
-        remaining -= count
-        boundaries.append({"tier": distribution["tier"], "end_rank": total_players - remaining})
-
-    return boundaries
+async def create_match_if_possible(guild: discord.Guild) -> None:
+    for bracket in queue_brackets:
+        await create_match_for_queue(guild, bracket)
 
 
-def get_tier_by_rank(rank: int, boundaries: List[Dict[str, int]]) -> Optional[str]:
-    if rank <= 0 or not boundaries:
-        return None
+@tasks.loop(seconds=config.MATCHMAKING_TICK_SECONDS)
+async def matchmaking_tick() -> None:
+    """Passe périodique : rattrape les lobbies devenus possibles sans nouveau !join."""
+    channel = bot.get_channel(config.MATCH_CHANNEL_ID)
+    if channel is None:
+        return
+    try:
+        await create_match_if_possible(channel.guild)
+    except Exception:
+        logger.exception("Échec de la passe de matchmaking")
+
+
+@tasks.loop(minutes=config.TIER_ROLE_RECONCILE_MINUTES)
+async def tier_role_reconcile() -> None:
+    """Rattrape les rôles manqués (changements abandonnés, modifications manuelles)."""
+    try:
+        queued = await tier_roles.reconcile(database.rank_snapshot)
+    except Exception:
+        logger.exception("Échec de la réconciliation des rôles de tier")
+        return
+    if queued:
+        logger.info("%s membre(s) à corriger pour les rôles de tier", queued)
 
-    for boundary in boundaries:
-        end_rank = boundary.get("end_rank")
-        if isinstance(end_rank, int) and rank <= end_rank:
-            return boundary.get("tier")
 
-    return None
+@tasks.loop(seconds=config.RANK_FLUSH_SECONDS)
+async def rank_flush() -> None:
+    """Écrit en lot les rangs décalés depuis la passe précédente (hors du chemin des commandes)."""
+    try:
+        await async_database.flush_rank_rows()
+    except Exception:
+        logger.exception("Échec de l'écriture des rangs")
 
 
 @bot.event
 async def on_ready():
     logger.info("Bot connecté en tant que %s", bot.user)
+    if not matchmaking_tick.is_running():
+        matchmaking_tick.start()
+    if not rank_flush.is_running():
+        rank_flush.start()
+    channel = bot.get_channel(config.MATCH_CHANNEL_ID)
+    if config.TIER_ROLE_SYNC_ENABLED and channel is not None:
+        tier_roles.start(channel.guild)
+        database.rank_snapshot.on_tier_change = tier_roles.submit_threadsafe
+        if not tier_role_reconcile.is_running():
+            tier_role_reconcile.start()
 
 
 @bot.command(name="ping")
@@ -477,45 +733,32 @@ async def ping_command(ctx: commands.Context):
 @commands.cooldown(rate=3, per=10, type=commands.BucketType.user)  # SEC #5 : max 3 !join / 10s par user
 async def join_queue(ctx: commands.Context):
     user_id = ctx.author.id
-    if database.player_has_pending_match(user_id):
+    if user_id in players_in_creation:
+        await ctx.reply("Ton match est en cours de création, il arrive dans le salon des matchs.")
+        return
+    if await async_database.player_has_pending_match(user_id):
         await ctx.reply(
             "Tu as déjà un match en attente de validation. Attends que le résultat soit confirmé."
         )
         return
 
-    player = database.ensure_player(user_id, ctx.author.display_name)
-    target_queue = get_queue_for_elo(player.solo_elo)
-    queue_number = get_queue_number_for_elo(player.solo_elo)
+    player = await async_database.ensure_player(user_id, ctx.author.display_name)
+    bracket = queue_brackets.for_elo(player.solo_elo)
+    target_queue = bracket.queue
+    queue_number = bracket.number
     # UX #1 : label lisible du seuil de la file assignée
-    queue_threshold_label = (
-        f"≥ {config.QUEUE_OR_1_MIN_ELO} ELO (Or 1+)"
-        if queue_number == 2
-        else f"< {config.QUEUE_OR_1_MIN_ELO} ELO (Bronze → Or)"
-    )
+    queue_threshold_label = bracket.threshold_label
     rank_emoji = elo_system.get_rank_emoji(player.solo_elo)
 
-    async with queue_lock:
-        if user_id in solo_queue_1 or user_id in solo_queue_2:
+    async with bracket.lock:
+        if queue_brackets.bracket_of(user_id) is not None:
             await ctx.reply("Tu es déjà dans une file d'attente.")
             return
 
-        queued_players = list(database.fetch_players(target_queue).values())
-        if not is_elo_compatible_for_queue(player.solo_elo, queued_players):
-            queue_elos = [queued_player.solo_elo for queued_player in queued_players]
-            min_elo = min(queue_elos)
-            max_elo = max(queue_elos)
-            max_diff = config.QUEUE_MAX_ELO_DIFF
-            # UX #1 : préciser l'ELO du joueur + l'écart exact pour éviter la frustration
-            gap = max(abs(player.solo_elo - min_elo), abs(player.solo_elo - max_elo))
-            await ctx.reply(
-                f"⚠️ Écart ELO trop élevé pour rejoindre la file #{queue_number}.\n"
-                f"Ton ELO : **{player.solo_elo}** {rank_emoji} — "
-                f"File actuelle : **{min_elo}–{max_elo}** — "
-                f"Écart : **{gap}** (max autorisé : {max_diff})."
-            )
-            return
-
-        target_queue.append(user_id)
+        # Plus de refus sur l'écart ELO : la fenêtre acceptée par chaque joueur
+        # s'élargit avec son attente et c'est la passe de matchmaking qui l'applique.
+        queue_brackets.enqueue(bracket, user_id, player.solo_elo)
+        arrival_estimator.record(player.solo_elo)
         queue_size = len(target_queue)
 
     await ctx.reply(
@@ -523,65 +766,68 @@ async def join_queue(ctx: commands.Context):
         f"({queue_threshold_label}) — {rank_emoji} **{player.solo_elo} ELO** — "
         f"{queue_size}/{config.QUEUE_TARGET_SIZE} joueurs."
     )
-    await create_match_if_possible(ctx.guild)
+    await create_match_for_queue(ctx.guild, bracket)
 
 
 @bot.command(name="leave")
 @commands.cooldown(rate=3, per=10, type=commands.BucketType.user)
 async def leave_queue(ctx: commands.Context):
     user_id = ctx.author.id
-    async with queue_lock:
-        if user_id in solo_queue_1:
-            solo_queue_1.remove(user_id)
-            await ctx.reply("✅ Tu as quitté la file #1.")
-            return
-        if user_id in solo_queue_2:
-            solo_queue_2.remove(user_id)
-            await ctx.reply("✅ Tu as quitté la file #2.")
-            return
+    bracket = queue_brackets.bracket_of(user_id)
+    if bracket is not None:
+        async with bracket.lock:
+            if queue_brackets.dequeue(bracket, [user_id]):
+                await ctx.reply(f"✅ Tu as quitté la file #{bracket.number}.")
+                return
     await ctx.reply("Tu n'es dans aucune file d'attente.")
 
 
 @bot.command(name="queue")
 async def show_queue(ctx: commands.Context):
-    async with queue_lock:
-        queue_1 = list(solo_queue_1)
-        queue_2 = list(solo_queue_2)
+    # Lecture seule et sans await : pas besoin des verrous des files.
+    snapshots = [(bracket, bracket.queue.entries()) for bracket in queue_brackets]
 
     embed = discord.Embed(title="Files d'attente", colour=discord.Colour(config.EMBED_COLOR))
 
-    if not queue_1 and not queue_2:
+    if not any(entries for _, entries in snapshots):
         embed.description = "Les files sont vides."
         await ctx.reply(embed=embed)
         return
 
-    def format_queue_line(queue_copy: List[int]) -> str:
+    # UX #5 : l'ELO affiché est celui mémorisé à l'entrée en file, sans requête
+    def format_queue_line(queue_copy: List[QueueEntry]) -> str:
         if not queue_copy:
             return "Aucun joueur"
-        # UX #5 : récupérer les ELO en une seule requête pour toute la file
-        players_map = database.fetch_players(queue_copy)
         lines: List[str] = []
-        for index, user_id in enumerate(queue_copy, start=1):
-            member = ctx.guild.get_member(user_id)
-            name = member.display_name if member else f"Joueur {user_id}"
-            player = players_map.get(user_id)
-            if player:
-                rank_emoji = elo_system.get_rank_emoji(player.solo_elo)
-                lines.append(f"{index}. {rank_emoji} {name} — **{player.solo_elo} ELO**")
-            else:
-                lines.append(f"{index}. {name}")
+        for index, entry in enumerate(queue_copy, start=1):
+            member = ctx.guild.get_member(entry.discord_id)
+            name = member.display_name if member else f"Joueur {entry.discord_id}"
+            rank_emoji = elo_system.get_rank_emoji(entry.elo)
+            lines.append(f"{index}. {rank_emoji} {name} — **{entry.elo} ELO**")
         return "\n".join(lines)
 
-    embed.add_field(
-        name=f"File #1 (< Or 1) — {len(queue_1)}/{config.QUEUE_TARGET_SIZE}",
-        value=format_queue_line(queue_1),
-        inline=False,
-    )
-    embed.add_field(
-        name=f"File #2 (≥ Or 1) — {len(queue_2)}/{config.QUEUE_TARGET_SIZE}",
-        value=format_queue_line(queue_2),
-        inline=False,
-    )
+    for bracket, entries in snapshots:
+        embed.add_field(
+            name=(
+                f"File #{bracket.number} ({bracket.threshold_label}) — "
+                f"{len(entries)}/{config.QUEUE_TARGET_SIZE} — "
+                f"ETA {format_eta(estimate_queue_eta(bracket.queue))}"
+            ),
+            value=format_queue_line(entries),
+            inline=False,
+        )
+    own_bracket = queue_brackets.bracket_of(ctx.author.id)
+    if own_bracket is not None:
+        queue = own_bracket.queue
+        entry = queue.get(ctx.author.id)
+        if entry:
+            embed.set_footer(
+                text=(
+                    f"Ta position : {queue.position(ctx.author.id)} — "
+                    f"écart accepté ±{round(elo_window.reach(entry.wait_time()))} ELO — "
+                    f"match estimé : {format_eta(estimate_queue_eta(queue, entry))}"
+                )
+            )
     await ctx.reply(embed=embed)
 
 
@@ -598,7 +844,7 @@ async def show_maps(ctx: commands.Context):
 @commands.cooldown(rate=5, per=10, type=commands.BucketType.user)
 async def show_elo(ctx: commands.Context, member: Optional[discord.Member] = None):
     target = member or ctx.author
-    player = database.fetch_player(target.id)
+    player = await async_database.fetch_player(target.id)
     if not player:
         await ctx.reply("Aucune donnée pour ce joueur.")
         return
@@ -611,7 +857,7 @@ async def show_elo(ctx: commands.Context, member: Optional[discord.Member] = Non
 @bot.command(name="ranks", aliases=["profil"])
 async def profile_rank(ctx: commands.Context, member: Optional[discord.Member] = None):
     target = member or ctx.author
-    player = database.fetch_player(target.id)
+    player = await async_database.fetch_player(target.id)
     if not player:
         await ctx.reply("Aucune donnée pour ce joueur.")
         return
@@ -625,19 +871,68 @@ async def profile_rank(ctx: commands.Context, member: Optional[discord.Member] =
     embed.add_field(name="ELO", value=str(player.solo_elo), inline=True)
     embed.add_field(name="Victoires/Défaites", value=f"{player.solo_wins}/{player.solo_losses}", inline=True)
     embed.add_field(name="Winrate", value=format_player_winrate(player), inline=True)
+    ranking = database.rank_snapshot.get(target.id)
+    if ranking:
+        embed.add_field(name="Classement", value=f"#{ranking.rank}", inline=True)
+        embed.add_field(name="Tier", value=ranking.tier or "Sans tier", inline=True)
     embed.set_thumbnail(url=target.display_avatar.url)
     await ctx.reply(embed=embed)
 
 
 @bot.command(name="lb")
 @commands.cooldown(rate=2, per=15, type=commands.BucketType.user)
-async def leaderboard(ctx: commands.Context):
+async def leaderboard(ctx: commands.Context, cible: Optional[str] = None):
     view = LeaderboardPaginationView(ctx)
-    embed = await view._render()
+    if cible and cible.lower() in {"me", "moi"}:
+        page = database.leaderboard.page_of(ctx.author.id, LEADERBOARD_PAGE_SIZE)
+        if page is None:
+            await ctx.reply("Tu n'es pas encore classé.")
+            return
+        # Le curseur est la dernière ligne de la page précédente.
+        previous = database.leaderboard.slice((page - 1) * LEADERBOARD_PAGE_SIZE, 1)
+        if page > 1 and previous:
+            view = LeaderboardPaginationView(ctx, page, previous[0].db_key)
+    embed = await view._render(after=view.start_after)
     message = await ctx.reply(embed=embed, view=view)
     view.message = message
 
 
+@bot.command(name="rank")
+@commands.cooldown(rate=5, per=10, type=commands.BucketType.user)
+async def show_rank(ctx: commands.Context, member: Optional[discord.Member] = None):
+    target = member or ctx.author
+    ranked = database.leaderboard.get(target.id)
+    if ranked is None:
+        await ctx.reply("Aucune donnée pour ce joueur.")
+        return
+
+    total_players = len(database.leaderboard)
+    tier = get_tier_by_rank(ranked.rank, compute_tier_boundaries(total_players)) or "Sans tier"
+    lines = [
+        f"**{target.display_name}** est **#{ranked.rank}** sur {total_players} — "
+        f"{ranked.solo_elo} ELO — Tier {tier}",
+        "",
+    ]
+    for neighbour in database.leaderboard.around(target.id, radius=2):
+        member_obj = ctx.guild.get_member(neighbour.discord_id) if ctx.guild else None
+        name = member_obj.display_name if member_obj else (
+            neighbour.name or f"Joueur {neighbour.discord_id}"
+        )
+        marker = "➡️ " if neighbour.discord_id == target.id else ""
+        lines.append(f"{marker}**{neighbour.rank}.** {name} — {neighbour.solo_elo} ELO")
+    page = (ranked.rank - 1) // LEADERBOARD_PAGE_SIZE + 1
+    lines.append(f"\nPage {page} du classement (`!lb me`).")
+    await ctx.reply("\n".join(lines))
+
+
+@bot.command(name="history")
+@commands.cooldown(rate=3, per=15, type=commands.BucketType.user)
+async def show_history(ctx: commands.Context, member: Optional[discord.Member] = None):
+    view = HistoryPaginationView(ctx, member or ctx.author)
+    embed = await view._render()
+    view.message = await ctx.reply(embed=embed, view=view)
+
+
 @bot.command(name="resetstats")
 @commands.has_permissions(manage_guild=True)
 async def reset_stats(ctx: commands.Context, member: discord.Member):
@@ -647,8 +942,8 @@ async def reset_stats(ctx: commands.Context, member: discord.Member):
     if ctx.guild is None:
         await ctx.reply("Cette commande ne peut être utilisée que dans un serveur.")
         return
-    player = database.ensure_player(member.id, member.display_name)
-    database.apply_player_updates(
+    player = await async_database.ensure_player(member.id, member.display_name)
+    await async_database.apply_player_updates(
         [
             {
                 "discord_id": player.discord_id,
@@ -661,6 +956,51 @@ async def reset_stats(ctx: commands.Context, member: discord.Member):
     await ctx.reply(f"Stats de {member.display_name} réinitialisées.")
 
 
+@bot.command(name="perf")
+@commands.has_permissions(manage_guild=True)
+async def perf_stats(ctx: commands.Context):
+    """Affiche les compteurs internes (dimensionnement des caches)."""
+    cache_stats = database.player_cache.stats()
+    wait_summary = wait_stats.summary()
+    page_stats = leaderboard_pages.stats()
+    history_stats = database.history_cache.stats()
+    expiry_stats = match_expiry.stats()
+    outbound_stats = outbound.stats()
+    pipeline_stats = lobby_pipeline.stats()
+    lines = [
+        "**Cache joueurs**",
+        f"Entrées : {cache_stats['size']}/{cache_stats['maxsize']}",
+        f"Hits/Miss : {cache_stats['hits']}/{cache_stats['misses']} "
+        f"(taux {cache_stats['hit_rate'] * 100:.1f}%)",
+        f"**Cache classement** : {page_stats['size']}/{page_stats['maxsize']} pages — "
+        f"taux {page_stats['hit_rate'] * 100:.1f}% ({page_stats['hits']}/{page_stats['misses']})",
+        f"**Cache historique** : {history_stats['players']}/{history_stats['max_players']} joueurs — "
+        f"taux {history_stats['hit_rate'] * 100:.1f}%",
+        f"**Attente avant match** ({len(wait_stats)} joueurs) : "
+        f"médiane {wait_summary['median']:.0f}s — p95 {wait_summary['p95']:.0f}s",
+        f"**Matchs en attente indexés** : {len(database.pending_index)} "
+        f"(mode {config.PENDING_INDEX_MODE})",
+        f"**Votes en mémoire** : {len(vote_store)} matchs",
+        f"**Expirations** : {expiry_stats['scheduled']} planifiées — "
+        f"{expiry_stats['expired']} annulées, {expiry_stats['failed']} échecs",
+        f"**Envois Discord** : {outbound_stats['depth']} en attente "
+        f"({outbound_stats['channels']} salons) — {outbound_stats['merged']} éditions fusionnées, "
+        f"{outbound_stats['dropped']} abandonnées, {outbound_stats['failed']} échecs",
+        f"**Création de matchs** : {pipeline_stats['in_flight']}/{lobby_pipeline.max_pending} en cours "
+        f"(résolution {pipeline_stats['resolve']}, équilibrage {pipeline_stats['balance']}, "
+        f"enregistrement {pipeline_stats['persist']}, annonce {pipeline_stats['announce']}) — "
+        f"{pipeline_stats['completed']} créés, {pipeline_stats['failed']} échecs",
+    ]
+    if config.TIER_ROLE_SYNC_ENABLED:
+        role_stats = tier_roles.stats()
+        lines.append(
+            f"**Rôles de tier** : {role_stats['pending']} en attente — "
+            f"{role_stats['applied']} appliqués, {role_stats['failed']} échecs, "
+            f"{role_stats['dropped']} reportés à la réconciliation"
+        )
+    await ctx.reply("\n".join(lines))
+
+
 @reset_stats.error
 async def reset_stats_error(ctx: commands.Context, error: commands.CommandError):
     if isinstance(error, commands.MissingPermissions):
@@ -690,7 +1030,9 @@ async def help_command(ctx: commands.Context):
         "!queue — Afficher les files en cours\n"
         "!elo [@joueur] — Voir les statistiques\n"
         "!ranks / !profil [@joueur] — Voir le profil rang\n"
-        "!lb — Voir le classement paginé\n"
+        "!lb [me] — Voir le classement paginé (ou directement sa page)\n"
+        "!rank [@joueur] — Voir son rang et ses voisins au classement\n"
+        "!history [@joueur] — Voir les derniers matchs joués\n"
         "!maps — Voir la rotation des cartes\n"
         "!ping — Activer/désactiver le rôle de notification"
     )
@@ -704,8 +1046,27 @@ async def main():
     if not config.DATABASE_URL:
         raise RuntimeError("DATABASE_URL environment variable is not set")
 
-    database.init_db()
-    await bot.start(config.DISCORD_TOKEN)
+    await async_database.init_db()
+    ranked_count = await async_database.load_leaderboard()
+    logger.info("%s joueur(s) chargé(s) dans le classement mémoire", ranked_count)
+    await async_database.load_rank_snapshot()
+    pending_count = await async_database.load_pending_index()
+    logger.info("%s match(s) en attente chargé(s) dans l'index", pending_count)
+    match_expiry.load(await async_database.fetch_pending_created_at())
+    try:
+        await bot.start(config.DISCORD_TOKEN)
+    finally:
+        database.rank_snapshot.on_tier_change = None
+        await tier_roles.stop()
+        await lobby_pipeline.stop()
+        await match_expiry.stop()
+        await outbound.stop()
+        try:
+            await async_database.flush_rank_rows()
+        except Exception:
+            logger.exception("Échec de l'écriture des rangs à l'arrêt")
+        await bot.close()
+        async_database.close()
 
 
 if __name__ == "__main__":
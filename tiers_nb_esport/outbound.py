@@ -0,0 +1,217 @@
+"""File d'envoi des messages du bot : éditions fusionnées, débit limité par salon."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, Union
+
+import discord
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+HIGH = 0  # messages attendus par les joueurs (résultats, annonces)
+LOW = 1  # rafraîchissements d'embed, boutons désactivés, journaux
+
+Editable = Union[discord.Message, discord.PartialMessage]
+
+
+@dataclass
+class _Op:
+    channel: discord.abc.Messageable
+    kwargs: Dict[str, Any]
+    ready_at: float
+    message: Optional[Editable] = None  # None : envoi d'un nouveau message
+    future: Optional[asyncio.Future] = None
+
+
+@dataclass
+class _Channel:
+    tokens: float
+    updated_at: float
+    high: Deque[_Op] = field(default_factory=deque)
+    edits: "OrderedDict[int, _Op]" = field(default_factory=OrderedDict)
+    low: Deque[_Op] = field(default_factory=deque)
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.high) + len(self.edits) + len(self.low)
+
+
+class OutboundScheduler:
+    """Envois et éditions regroupés par salon, avec un seau de jetons par salon.
+
+    Les éditions d'un même message attendent `edit_window` secondes et se
+    fusionnent entre-temps (dernier état gagnant, champ par champ) : une
+    série de votes ne coûte qu'une édition, et une seule édition par message
+    peut être en attente. Dans un salon, les envois `HIGH` passent avant les
+    éditions, elles-mêmes avant les envois `LOW` ; au-delà de `max_pending`
+    envois `LOW` en attente, le plus ancien est abandonné. Les réponses aux
+    interactions ne passent pas par ici : elles ont leur propre quota et un
+    délai de 3 s.
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: int = 5,
+        edit_window: float = 1.0,
+        max_pending: int = 50,
+    ):
+        self.rate = max(0.01, float(rate))
+        self.burst = max(1, int(burst))
+        self.edit_window = max(0.0, float(edit_window))
+        self.max_pending = max(1, int(max_pending))
+        self._channels: Dict[int, _Channel] = {}
+        self.sent = 0
+        self.edited = 0
+        self.merged = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @classmethod
+    def from_config(cls) -> "OutboundScheduler":
+        return cls(
+            rate=config.OUTBOUND_CHANNEL_RATE,
+            burst=config.OUTBOUND_CHANNEL_BURST,
+            edit_window=config.OUTBOUND_EDIT_WINDOW,
+            max_pending=config.OUTBOUND_MAX_PENDING,
+        )
+
+    def __len__(self) -> int:
+        return sum(len(state) for state in self._channels.values())
+
+    def _state(self, channel_id: int) -> _Channel:
+        state = self._channels.get(channel_id)
+        if state is None:
+            state = _Channel(tokens=float(self.burst), updated_at=time.monotonic())
+            self._channels[channel_id] = state
+        if state.task is None or state.task.done():
+            state.task = asyncio.get_running_loop().create_task(self._run(channel_id, state))
+        return state
+
+    def send(
+        self, channel: discord.abc.Messageable, priority: int = HIGH, **kwargs: Any
+    ) -> "asyncio.Future[Optional[discord.Message]]":
+        """Planifie `channel.send(**kwargs)` ; le futur donne le message (None si abandonné ou en échec)."""
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        state = self._state(channel.id)
+        op = _Op(channel, kwargs, time.monotonic(), future=future)
+        if priority == HIGH:
+            state.high.append(op)
+        else:
+            state.low.append(op)
+            while len(state.low) > self.max_pending:
+                self.dropped += 1
+                state.low.popleft().future.set_result(None)
+        state.wakeup.set()
+        return future
+
+    def edit(self, message: Editable, **kwargs: Any) -> None:
+        """Planifie `message.edit(**kwargs)`, fusionné avec une édition déjà en attente."""
+        state = self._state(message.channel.id)
+        pending = state.edits.get(message.id)
+        if pending is not None:
+            pending.kwargs.update(kwargs)
+            pending.message = message
+            self.merged += 1
+            return
+        state.edits[message.id] = _Op(
+            message.channel, dict(kwargs), time.monotonic() + self.edit_window, message=message
+        )
+        state.wakeup.set()
+
+    def _refill(self, state: _Channel) -> None:
+        now = time.monotonic()
+        state.tokens = min(self.burst, state.tokens + (now - state.updated_at) * self.rate)
+        state.updated_at = now
+
+    def _next(self, state: _Channel) -> Union[_Op, float, None]:
+        """Prochaine opération prête, sinon l'instant où la première le sera."""
+        if state.high:
+            return state.high.popleft()
+        # Fenêtre de fusion constante : la plus ancienne édition est la première prête.
+        if state.edits:
+            message_id, op = next(iter(state.edits.items()))
+            if op.ready_at <= time.monotonic():
+                del state.edits[message_id]
+                return op
+            if not state.low:
+                return op.ready_at
+        if state.low:
+            return state.low.popleft()
+        return None
+
+    async def _wait(self, state: _Channel, timeout: Optional[float]) -> None:
+        state.wakeup.clear()
+        try:
+            await asyncio.wait_for(state.wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self, channel_id: int, state: _Channel) -> None:
+        while True:
+            if not len(state):
+                await self._wait(state, timeout=60.0)
+                if not len(state):
+                    # Salon inactif : on libère son état.
+                    self._channels.pop(channel_id, None)
+                    return
+                continue
+            self._refill(state)
+            if state.tokens < 1:
+                await asyncio.sleep((1 - state.tokens) / self.rate)
+                continue
+            op = self._next(state)
+            if not isinstance(op, _Op):
+                await self._wait(state, None if op is None else max(0.0, op - time.monotonic()))
+                continue
+            state.tokens -= 1
+            await self._execute(op)
+
+    async def _execute(self, op: _Op) -> None:
+        message: Optional[discord.Message] = None
+        try:
+            if op.message is not None:
+                await op.message.edit(**op.kwargs)
+                self.edited += 1
+            else:
+                message = await op.channel.send(**op.kwargs)
+                self.sent += 1
+        except Exception:
+            # Une erreur ne doit ni arrêter le worker du salon ni laisser un appelant en attente.
+            self.failed += 1
+            logger.warning("Envoi Discord échoué (salon %s)", op.channel.id, exc_info=True)
+        finally:
+            if op.future is not None and not op.future.done():
+                op.future.set_result(message)
+
+    async def stop(self) -> None:
+        for state in list(self._channels.values()):
+            if state.task is not None:
+                state.task.cancel()
+                try:
+                    await state.task
+                except asyncio.CancelledError:
+                    pass
+            # Envois jamais exécutés : leurs appelants reçoivent None.
+            for op in list(state.high) + list(state.low):
+                if op.future is not None and not op.future.done():
+                    op.future.set_result(None)
+        self._channels.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "depth": len(self),
+            "channels": len(self._channels),
+            "sent": self.sent,
+            "edited": self.edited,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
@@ -0,0 +1,56 @@
+"""Index mémoire des joueurs engagés dans un match en attente de validation."""
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+
+class PendingMatchIndex:
+    """Associe chaque joueur à son match `pending` pour un test d'appartenance en O(1).
+
+    Chargé au démarrage depuis `matches`, puis tenu à jour par `record_match`,
+    `complete_match` et `cancel_match`. Tant qu'il n'est pas chargé, `database`
+    retombe sur la requête SQL.
+    """
+
+    def __init__(self) -> None:
+        self.loaded = False
+        self._player_to_match: Dict[int, int] = {}
+        self._match_to_players: Dict[int, Set[int]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._match_to_players)
+
+    def load(self, matches: Iterable[Dict]) -> None:
+        with self._lock:
+            self._player_to_match.clear()
+            self._match_to_players.clear()
+            for match in matches:
+                self._add(match)
+            self.loaded = True
+
+    def add(self, match: Dict) -> None:
+        with self._lock:
+            self._add(match)
+
+    def _add(self, match: Dict) -> None:
+        match_id = int(match["id"])
+        players = {int(pid) for pid in list(match["team1_ids"]) + list(match["team2_ids"])}
+        self._match_to_players[match_id] = players
+        for discord_id in players:
+            self._player_to_match[discord_id] = match_id
+
+    def remove(self, match_id: int) -> None:
+        match_id = int(match_id)
+        with self._lock:
+            players = self._match_to_players.pop(match_id, set())
+            for discord_id in players:
+                if self._player_to_match.get(discord_id) == match_id:
+                    del self._player_to_match[discord_id]
+
+    def match_for(self, discord_id: int) -> Optional[int]:
+        return self._player_to_match.get(int(discord_id))
+
+    def contains(self, discord_id: int) -> bool:
+        return int(discord_id) in self._player_to_match
@@ -0,0 +1,126 @@
+"""Cache mémoire des joueurs (LRU + TTL optionnel) devant la table `players`."""
+from __future__ import annotations
+
+import dataclasses
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .database import Player
+
+
+class PlayerCache:
+    """Cache write-through indexé par `discord_id`.
+
+    Les fonctions de `database` le remplissent et le tiennent à jour ; il est
+    partagé entre les threads de `async_database`, d'où le verrou.
+    `ttl` à 0 désactive l'expiration.
+    """
+
+    def __init__(self, maxsize: int = 5000, ttl: float = 0.0):
+        self.maxsize = max(0, int(maxsize))
+        self.ttl = max(0.0, float(ttl))
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, Tuple[Player, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _is_fresh(self, stored_at: float, now: float) -> bool:
+        return not self.ttl or now - stored_at < self.ttl
+
+    def _lookup(self, discord_id: int, now: float) -> Optional["Player"]:
+        entry = self._entries.get(discord_id)
+        if entry is None:
+            return None
+        player, stored_at = entry
+        if not self._is_fresh(stored_at, now):
+            del self._entries[discord_id]
+            return None
+        self._entries.move_to_end(discord_id)
+        return player
+
+    def get(self, discord_id: int) -> Optional["Player"]:
+        with self._lock:
+            player = self._lookup(int(discord_id), time.monotonic())
+            if player is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return player
+
+    def get_many(self, discord_ids: Iterable[int]) -> Tuple[Dict[int, "Player"], List[int]]:
+        """Retourne les joueurs en cache et la liste des ids manquants."""
+        found: Dict[int, Player] = {}
+        missing: List[int] = []
+        with self._lock:
+            now = time.monotonic()
+            for discord_id in discord_ids:
+                discord_id = int(discord_id)
+                player = self._lookup(discord_id, now)
+                if player is None:
+                    missing.append(discord_id)
+                else:
+                    found[discord_id] = player
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put(self, player: "Player") -> None:
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._store(player, time.monotonic())
+
+    def put_many(self, players: Iterable["Player"]) -> None:
+        if not self.maxsize:
+            return
+        with self._lock:
+            now = time.monotonic()
+            for player in players:
+                self._store(player, now)
+
+    def _store(self, player: "Player", now: float) -> None:
+        self._entries[player.discord_id] = (player, now)
+        self._entries.move_to_end(player.discord_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def apply_updates(self, updates: Iterable[Dict[str, int]]) -> None:
+        """Reporte les stats écrites par `apply_player_updates` sur les entrées en cache."""
+        with self._lock:
+            now = time.monotonic()
+            for update in updates:
+                discord_id = int(update["discord_id"])
+                entry = self._entries.get(discord_id)
+                if entry is None:
+                    continue
+                player = dataclasses.replace(
+                    entry[0],
+                    solo_elo=int(update["solo_elo"]),
+                    solo_wins=int(update["solo_wins"]),
+                    solo_losses=int(update["solo_losses"]),
+                )
+                self._entries[discord_id] = (player, now)
+
+    def invalidate(self, discord_id: Optional[int] = None) -> None:
+        with self._lock:
+            if discord_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(int(discord_id), None)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
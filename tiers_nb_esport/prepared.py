@@ -0,0 +1,109 @@
+"""Requêtes chaudes préparées une fois par connexion, exécutées par nom."""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Sequence, Set
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+
+from . import config
+
+
+@dataclass(frozen=True)
+class Statement:
+    name: str
+    sql: str  # paramètres au format psycopg2 (%s), dans l'ordre de `types`
+    types: Sequence[str]
+
+    @property
+    def prepare_sql(self) -> str:
+        numbers = iter(range(1, len(self.types) + 1))
+        body = re.sub(r"%s", lambda _match: f"${next(numbers)}", self.sql)
+        return f"PREPARE {self.name} ({', '.join(self.types)}) AS {body}"
+
+    @property
+    def execute_sql(self) -> str:
+        if not self.types:
+            return f"EXECUTE {self.name}"
+        return f"EXECUTE {self.name} ({', '.join(['%s'] * len(self.types))})"
+
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """Connexion qui mémorise les requêtes déjà préparées côté serveur.
+
+    Un PREPARE vit autant que la session PostgreSQL : une connexion recréée
+    par le pool repart d'un ensemble vide et re-prépare à la demande.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared: Set[str] = set()
+        # Serveur et `prepared` désynchronisés : tout désallouer avant le prochain PREPARE.
+        self.needs_reset = False
+
+
+_registry: Dict[str, Statement] = {}
+
+
+def register(name: str, sql: str, *types: str) -> Statement:
+    statement = Statement(name, sql, tuple(types))
+    _registry[name] = statement
+    return statement
+
+
+def get(name: str) -> Statement:
+    return _registry[name]
+
+
+def registered() -> Dict[str, Statement]:
+    return dict(_registry)
+
+
+def _reset(cur) -> None:
+    cur.execute("DEALLOCATE ALL")
+    cur.connection.prepared.clear()
+    cur.connection.needs_reset = False
+
+
+def _prepare(cur, statement: Statement) -> None:
+    cur.execute(statement.prepare_sql)
+    cur.connection.prepared.add(statement.name)
+
+
+def execute(cur, statement: Statement, params: Sequence = ()) -> None:
+    """Exécute `statement` par nom, en le préparant au premier usage sur la connexion.
+
+    Si le serveur a perdu la requête préparée (DISCARD ALL d'un pooler,
+    session réinitialisée), toutes les requêtes de la connexion sont
+    désallouées (DEALLOCATE ALL, pour ne pas buter sur celles que le serveur
+    aurait gardées) puis celle-ci est re-préparée et l'appel rejoué — à
+    condition qu'aucune transaction ne soit en cours : sinon l'erreur remonte
+    (la transaction est de toute façon annulée) et l'appel suivant repart de
+    zéro.
+    """
+    conn = cur.connection
+    if not config.DB_PREPARED_STATEMENTS or not isinstance(conn, PreparingConnection):
+        cur.execute(statement.sql, params)
+        return
+
+    if conn.needs_reset:
+        _reset(cur)
+    if statement.name not in conn.prepared:
+        _prepare(cur, statement)
+        cur.execute(statement.execute_sql, params)
+        return
+
+    idle = conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    try:
+        cur.execute(statement.execute_sql, params)
+    except psycopg2.errors.InvalidSqlStatementName:
+        conn.needs_reset = True
+        if not idle:
+            raise
+        conn.rollback()
+        _reset(cur)
+        _prepare(cur, statement)
+        cur.execute(statement.execute_sql, params)
@@ -0,0 +1,102 @@
+"""Files matchmaking par tranche d'ELO, chacune avec son verrou."""
+from __future__ import annotations
+
+import asyncio
+import bisect
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from . import config, elo_system
+from .elo_queue import EloQueue, QueueEntry
+
+
+def _rank_name(elo: int) -> str:
+    return str(elo_system.get_rank_for_elo(elo)["name"])
+
+
+@dataclass
+class QueueBracket:
+    number: int
+    min_elo: int
+    max_elo: Optional[int]  # borne exclue, None pour la dernière file
+    queue: EloQueue = field(default_factory=EloQueue)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    @property
+    def threshold_label(self) -> str:
+        """Ex. « < 1500 ELO (Bronze → Or) » ou « ≥ 1500 ELO (Or 1+) »."""
+        first = _rank_name(self.min_elo)
+        if self.max_elo is None:
+            if self.min_elo <= 0:
+                return "tous ELO"
+            return f"≥ {self.min_elo} ELO ({first}+)"
+        last = _rank_name(self.max_elo - 1)
+        ranks = first if first == last else f"{first} → {last}"
+        if self.min_elo <= 0:
+            return f"< {self.max_elo} ELO ({ranks})"
+        return f"{self.min_elo}–{self.max_elo - 1} ELO ({ranks})"
+
+
+class BracketRouter:
+    """Aiguille un joueur vers sa file par bisect sur les seuils précalculés.
+
+    `members` garde la file de chaque joueur en attente : savoir si un joueur
+    est déjà en file, et laquelle, ne demande aucun parcours.
+    """
+
+    def __init__(self, min_elos: Sequence[int]):
+        thresholds = sorted({int(value) for value in min_elos}) or [0]
+        self._thresholds: List[int] = thresholds
+        self.brackets: List[QueueBracket] = [
+            QueueBracket(
+                number=index + 1,
+                min_elo=low,
+                max_elo=thresholds[index + 1] if index + 1 < len(thresholds) else None,
+            )
+            for index, low in enumerate(thresholds)
+        ]
+        self.members: Dict[int, QueueBracket] = {}
+
+    @classmethod
+    def from_config(cls) -> "BracketRouter":
+        return cls(config.QUEUE_BRACKET_MIN_ELOS)
+
+    def __iter__(self) -> Iterator[QueueBracket]:
+        return iter(self.brackets)
+
+    def __len__(self) -> int:
+        return len(self.brackets)
+
+    def for_elo(self, elo: int) -> QueueBracket:
+        # Un ELO sous le premier seuil est rattaché à la première file.
+        index = max(0, bisect.bisect_right(self._thresholds, elo) - 1)
+        return self.brackets[index]
+
+    def bracket_of(self, discord_id: int) -> Optional[QueueBracket]:
+        return self.members.get(discord_id)
+
+    def total_waiting(self) -> int:
+        return len(self.members)
+
+    # Les trois méthodes suivantes s'appellent en tenant `bracket.lock`.
+
+    def enqueue(self, bracket: QueueBracket, discord_id: int, elo: int) -> QueueEntry:
+        entry = bracket.queue.add(discord_id, elo)
+        self.members[discord_id] = bracket
+        return entry
+
+    def dequeue(self, bracket: QueueBracket, discord_ids: Sequence[int]) -> List[QueueEntry]:
+        entries = bracket.queue.pop_many(list(discord_ids))
+        for entry in entries:
+            self.members.pop(entry.discord_id, None)
+        return entries
+
+    def requeue(self, bracket: QueueBracket, entries: Sequence[QueueEntry]) -> List[QueueEntry]:
+        """Remet en file des joueurs dont le match n'a pas pu être créé, sans perdre leur attente."""
+        restored = []
+        for entry in entries:
+            if entry.discord_id in self.members:
+                continue
+            restored.append(bracket.queue.add(entry.discord_id, entry.elo, joined_at=entry.joined_at))
+            self.members[entry.discord_id] = bracket
+        return restored
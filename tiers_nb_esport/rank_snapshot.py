@@ -0,0 +1,118 @@
+"""Instantané rang/tier par joueur, rafraîchi par tranches de classement."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from .leaderboard import RankedLeaderboard
+from .tiers import compute_tier_boundaries, get_tier_by_rank
+
+
+@dataclass(frozen=True)
+class RankRow:
+    discord_id: int
+    rank: int
+    tier: Optional[str]
+
+
+@dataclass(frozen=True)
+class TierChange:
+    discord_id: int
+    old_tier: Optional[str]
+    new_tier: Optional[str]
+
+
+def _merge(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class RankSnapshot:
+    """Rang et tier de chaque joueur, dérivés du classement mémoire.
+
+    Après un match, seuls les rangs compris entre l'ancienne et la nouvelle
+    position des joueurs qui ont bougé changent ; s'y ajoutent, quand le
+    nombre de joueurs change, les rangs qui passent d'un côté à l'autre d'une
+    frontière de tier. `refresh` ne recalcule que ces tranches et retourne les
+    lignes à persister dans `player_ranks`.
+
+    Les joueurs qui changent de tier sont transmis à `on_tier_change`
+    (synchronisation des rôles Discord).
+    """
+
+    def __init__(self, leaderboard: RankedLeaderboard):
+        self.leaderboard = leaderboard
+        self.loaded = False
+        self._tiers: Dict[int, Optional[str]] = {}
+        self._boundaries: List[Dict[str, int]] = []
+        self.on_tier_change: Optional[Callable[[List[TierChange]], None]] = None
+
+    def tier_of(self, discord_id: int) -> Optional[str]:
+        return self._tiers.get(int(discord_id))
+
+    def get(self, discord_id: int) -> Optional[RankRow]:
+        rank = self.leaderboard.rank_of(discord_id)
+        if rank is None:
+            return None
+        return RankRow(int(discord_id), rank, self._tiers.get(int(discord_id)))
+
+    def rebuild(self, chunk_size: int = 1000) -> Iterator[List[RankRow]]:
+        """Recalcul complet, par paquets de `chunk_size` lignes."""
+        total = len(self.leaderboard)
+        self._boundaries = compute_tier_boundaries(total)
+        self._tiers = {}
+        for start in range(1, total + 1, chunk_size):
+            rows = [
+                RankRow(player.discord_id, player.rank, get_tier_by_rank(player.rank, self._boundaries))
+                for player in self.leaderboard.slice(start, chunk_size)
+            ]
+            for row in rows:
+                self._tiers[row.discord_id] = row.tier
+            yield rows
+        self.loaded = True
+
+    def _dirty_ranges(
+        self, old_ranks: Mapping[int, Optional[int]], boundaries: List[Dict[str, int]]
+    ) -> List[Tuple[int, int]]:
+        total = len(self.leaderboard)
+        ranges: List[Tuple[int, int]] = []
+        for discord_id, old_rank in old_ranks.items():
+            new_rank = self.leaderboard.rank_of(discord_id)
+            if new_rank is None:
+                continue
+            if old_rank is None:
+                # Nouveau joueur : tous les rangs sous lui ont glissé d'une place.
+                ranges.append((new_rank, total))
+            elif old_rank != new_rank:
+                ranges.append((min(old_rank, new_rank), max(old_rank, new_rank)))
+
+        old_ends = {b["tier"]: b["end_rank"] for b in self._boundaries}
+        for boundary in boundaries:
+            old_end = old_ends.get(boundary["tier"], 0)
+            new_end = boundary["end_rank"]
+            if old_end != new_end:
+                ranges.append((min(old_end, new_end) + 1, min(total, max(old_end, new_end))))
+        return _merge([(max(1, start), end) for start, end in ranges if end >= start])
+
+    def refresh(self, old_ranks: Mapping[int, Optional[int]]) -> List[RankRow]:
+        """Met à jour les tranches touchées ; `old_ranks` = rangs avant le match."""
+        boundaries = compute_tier_boundaries(len(self.leaderboard))
+        rows: List[RankRow] = []
+        changes: List[TierChange] = []
+        for start, end in self._dirty_ranges(old_ranks, boundaries):
+            for player in self.leaderboard.slice(start, end - start + 1):
+                tier = get_tier_by_rank(player.rank, boundaries)
+                rows.append(RankRow(player.discord_id, player.rank, tier))
+                previous = self._tiers.get(player.discord_id)
+                if previous != tier:
+                    changes.append(TierChange(player.discord_id, previous, tier))
+                self._tiers[player.discord_id] = tier
+        self._boundaries = boundaries
+        if changes and self.on_tier_change is not None:
+            self.on_tier_change(changes)
+        return rows
@@ -0,0 +1,213 @@
+"""Recalcul complet des ratings à partir de l'historique des matchs.
+
+Usage : python -m tiers_nb_esport.replay [--apply] [--participants] [--k-factor K] [--show N]
+
+Sans `--apply`, affiche seulement l'écart entre les ratings rejoués et la
+table `players` (dry-run). `--participants` renseigne l'ELO avant/après de
+chaque joueur dans `match_participants`, pour les seules lignes encore vides
+(matchs antérieurs à la table). À lancer bot arrêté, ou en acceptant que son
+cache joueurs reste périmé jusqu'à expiration (PLAYER_CACHE_TTL).
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import config, database, elo_batch
+
+
+@dataclass
+class ReplayStats:
+    solo_elo: int
+    solo_wins: int = 0
+    solo_losses: int = 0
+
+
+@dataclass(frozen=True)
+class MatchReplay:
+    match_id: int
+    discord_ids: Tuple[int, ...]
+    deltas: Tuple[int, ...]
+    ratings_before: Tuple[int, ...] = ()
+
+    def participant_rows(self) -> Iterator[Tuple[int, int, int, int]]:
+        """Lignes (match_id, discord_id, elo_before, elo_after) pour `match_participants`."""
+        for discord_id, before, delta in zip(self.discord_ids, self.ratings_before, self.deltas):
+            yield self.match_id, discord_id, before, max(0, before + delta)
+
+
+@dataclass(frozen=True)
+class RatingDiff:
+    discord_id: int
+    current: ReplayStats
+    replayed: ReplayStats
+
+
+class RatingReplay:
+    """Rejoue les matchs dans l'ordre en appliquant les règles ELO par lots.
+
+    Des matchs consécutifs sans joueur commun sont indépendants : ils sont
+    calculés ensemble par `elo_batch`, ce qui garde l'ordre chronologique
+    exact. La mémoire se limite aux stats par joueur et au lot en cours.
+    """
+
+    def __init__(
+        self,
+        initial_elo: int = 1000,
+        k_factor: float = config.K_FACTOR,
+        max_batch: int = 4096,
+    ):
+        self.initial_elo = int(initial_elo)
+        self.k_factor = k_factor
+        self.max_batch = max(1, int(max_batch))
+        self.stats: Dict[int, ReplayStats] = {}
+        self.matches_replayed = 0
+
+    def _get(self, discord_id: int) -> ReplayStats:
+        stats = self.stats.get(discord_id)
+        if stats is None:
+            stats = self.stats[discord_id] = ReplayStats(self.initial_elo)
+        return stats
+
+    def replay(self, matches: Iterable[Dict]) -> Iterator[MatchReplay]:
+        """Applique les matchs et émet la variation ELO de chacun."""
+        batch: List[Dict] = []
+        batch_players: set = set()
+        for match in matches:
+            players = {int(pid) for pid in list(match["team1_ids"]) + list(match["team2_ids"])}
+            if len(batch) >= self.max_batch or not batch_players.isdisjoint(players):
+                yield from self._flush(batch)
+                batch, batch_players = [], set()
+            batch.append(match)
+            batch_players |= players
+        yield from self._flush(batch)
+
+    def _flush(self, batch: List[Dict]) -> Iterator[MatchReplay]:
+        if not batch:
+            return
+        ratings: List[int] = []
+        match_index: List[int] = []
+        teams: List[int] = []
+        winners: List[int] = []
+        ids: List[int] = []
+        for index, match in enumerate(batch):
+            for team, key in ((elo_batch.TEAM1, "team1_ids"), (elo_batch.TEAM2, "team2_ids")):
+                for pid in match[key]:
+                    ids.append(int(pid))
+                    ratings.append(self._get(int(pid)).solo_elo)
+                    match_index.append(index)
+                    teams.append(team)
+            winners.append(elo_batch.TEAM1 if match["winner"] == "bleue" else elo_batch.TEAM2)
+
+        result = elo_batch.compute_elo_batch(
+            ratings, match_index, teams, winners, k_factor=self.k_factor
+        )
+
+        start = 0
+        for index, match in enumerate(batch):
+            end = start
+            while end < len(ids) and match_index[end] == index:
+                end += 1
+            for position in range(start, end):
+                stats = self.stats[ids[position]]
+                stats.solo_elo = int(result.new_ratings[position])
+                if winners[index] == teams[position]:
+                    stats.solo_wins += 1
+                else:
+                    stats.solo_losses += 1
+            yield MatchReplay(
+                match_id=int(match["id"]),
+                discord_ids=tuple(ids[start:end]),
+                deltas=tuple(int(delta) for delta in result.deltas[start:end]),
+                ratings_before=tuple(int(rating) for rating in ratings[start:end]),
+            )
+            start = end
+        self.matches_replayed += len(batch)
+
+    def diff(self, current_rows: Iterable[Dict]) -> Iterator[RatingDiff]:
+        """Compare aux stats actuelles ; un joueur sans historique revient aux valeurs initiales."""
+        for row in current_rows:
+            discord_id = int(row["discord_id"])
+            current = ReplayStats(
+                int(row["solo_elo"]), int(row["solo_wins"]), int(row["solo_losses"])
+            )
+            replayed = self.stats.get(discord_id) or ReplayStats(self.initial_elo)
+            if current != replayed:
+                yield RatingDiff(discord_id, current, replayed)
+
+
+def write_back(diffs: Iterable[RatingDiff], chunk_size: int = 1000) -> int:
+    """Écrit les ratings rejoués par paquets (un UPDATE groupé par paquet)."""
+    written = 0
+    chunk: List[Dict[str, int]] = []
+    for item in diffs:
+        chunk.append(
+            {
+                "discord_id": item.discord_id,
+                "solo_elo": item.replayed.solo_elo,
+                "solo_wins": item.replayed.solo_wins,
+                "solo_losses": item.replayed.solo_losses,
+            }
+        )
+        if len(chunk) >= chunk_size:
+            database.apply_player_updates(chunk)
+            written += len(chunk)
+            chunk = []
+    if chunk:
+        database.apply_player_updates(chunk)
+        written += len(chunk)
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m tiers_nb_esport.replay")
+    parser.add_argument("--apply", action="store_true", help="Écrire les ratings rejoués")
+    parser.add_argument(
+        "--participants", action="store_true", help="Écrire l'ELO avant/après par participant"
+    )
+    parser.add_argument("--k-factor", type=float, default=config.K_FACTOR)
+    parser.add_argument("--initial-elo", type=int, default=1000)
+    parser.add_argument("--show", type=int, default=20, help="Nombre d'écarts affichés")
+    args = parser.parse_args(argv)
+
+    engine = RatingReplay(initial_elo=args.initial_elo, k_factor=args.k_factor)
+    start = time.perf_counter()
+    participant_rows: List[Tuple[int, int, int, int]] = []
+    participants_written = 0
+    for replayed in engine.replay(database.iter_completed_matches()):
+        if args.participants:
+            participant_rows.extend(replayed.participant_rows())
+            if len(participant_rows) >= 10_000:
+                participants_written += database.write_participant_ratings(participant_rows)
+                participant_rows = []
+    if participant_rows:
+        participants_written += database.write_participant_ratings(participant_rows)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{engine.matches_replayed} matchs rejoués en {elapsed:.2f}s "
+        f"({len(engine.stats)} joueurs concernés)"
+    )
+    if args.participants:
+        print(f"{participants_written} participation(s) renseignée(s)")
+
+    diffs = list(engine.diff(database.iter_player_stats()))
+    print(f"{len(diffs)} joueur(s) avec un écart")
+    for item in sorted(
+        diffs, key=lambda d: abs(d.replayed.solo_elo - d.current.solo_elo), reverse=True
+    )[: args.show]:
+        print(
+            f"  {item.discord_id}: {item.current.solo_elo} → {item.replayed.solo_elo} ELO, "
+            f"{item.current.solo_wins}V/{item.current.solo_losses}D → "
+            f"{item.replayed.solo_wins}V/{item.replayed.solo_losses}D"
+        )
+
+    if args.apply and diffs:
+        written = write_back(diffs)
+        print(f"{written} joueur(s) mis à jour")
+    database.close_pool()
+
+
+if __name__ == "__main__":
+    main()
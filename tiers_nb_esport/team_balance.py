@@ -0,0 +1,161 @@
+"""Moteur d'équilibrage des équipes (3v3 et N-contre-N)."""
+from __future__ import annotations
+
+import itertools
+import statistics
+from functools import lru_cache
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+# Au-delà, le nombre de répartitions explose (C(13, 6) = 1716 pour 7v7) :
+# on passe sur l'heuristique.
+EXHAUSTIVE_MAX_PLAYERS = 12
+
+Objective = Callable[[Sequence[float], Sequence[float]], float]
+
+
+def _mean(values: Sequence[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def average_gap(team1: Sequence[float], team2: Sequence[float]) -> float:
+    """Écart entre les moyennes ELO des deux équipes."""
+    return abs(_mean(team1) - _mean(team2))
+
+
+def variance_gap(team1: Sequence[float], team2: Sequence[float]) -> float:
+    """Écart des moyennes + écart des dispersions internes (équipes de même profil)."""
+    spread1 = statistics.pstdev(team1) if team1 else 0.0
+    spread2 = statistics.pstdev(team2) if team2 else 0.0
+    return average_gap(team1, team2) + abs(spread1 - spread2)
+
+
+def max_player_gap(team1: Sequence[float], team2: Sequence[float]) -> float:
+    """Écart des moyennes + écart entre les meilleurs joueurs de chaque équipe."""
+    best1 = max(team1) if team1 else 0.0
+    best2 = max(team2) if team2 else 0.0
+    return average_gap(team1, team2) + abs(best1 - best2)
+
+
+OBJECTIVES: Dict[str, Objective] = {
+    "average": average_gap,
+    "variance": variance_gap,
+    "spread": max_player_gap,
+}
+
+
+def _resolve_objective(objective: Union[str, Objective]) -> Objective:
+    if callable(objective):
+        return objective
+    try:
+        return OBJECTIVES[objective]
+    except KeyError:
+        raise ValueError(f"Objectif d'équilibrage inconnu : {objective!r}") from None
+
+
+@lru_cache(maxsize=None)
+def partition_table(player_count: int) -> Tuple[Tuple[Tuple[int, ...], Tuple[int, ...]], ...]:
+    """Toutes les répartitions (équipe 1, équipe 2) de `player_count` joueurs.
+
+    Avec un nombre pair, le joueur 0 est fixé dans l'équipe 1 pour ne pas
+    évaluer deux fois chaque répartition miroir : 10 lignes pour un 3v3, 35
+    pour un 4v4, 126 pour un 5v5. Avec un nombre impair, les équipes n'ont pas
+    la même taille et il n'y a pas de miroir : toutes sont énumérées.
+    """
+    team1_size = player_count - player_count // 2
+    everyone = range(player_count)
+    if player_count % 2 == 0:
+        candidates = (
+            (0,) + rest
+            for rest in itertools.combinations(range(1, player_count), team1_size - 1)
+        )
+    else:
+        candidates = itertools.combinations(everyone, team1_size)
+    table = []
+    for team1 in candidates:
+        members = set(team1)
+        table.append((team1, tuple(i for i in everyone if i not in members)))
+    return tuple(table)
+
+
+def _exhaustive_split(
+    ratings: Sequence[float], objective: Objective
+) -> Tuple[List[int], List[int]]:
+    best: Tuple[Tuple[int, ...], Tuple[int, ...]] = partition_table(len(ratings))[0]
+    best_score = float("inf")
+    if objective is average_gap and len(ratings) % 2 == 0:
+        # Équipes de même taille : minimiser |2·somme1 − total| suffit,
+        # sans recalculer les deux moyennes à chaque ligne.
+        total = sum(ratings)
+        for team1, team2 in partition_table(len(ratings)):
+            score = abs(2 * sum(ratings[i] for i in team1) - total)
+            if score < best_score:
+                best, best_score = (team1, team2), score
+    else:
+        for team1, team2 in partition_table(len(ratings)):
+            score = objective([ratings[i] for i in team1], [ratings[i] for i in team2])
+            if score < best_score:
+                best, best_score = (team1, team2), score
+    return list(best[0]), list(best[1])
+
+
+def _heuristic_split(
+    ratings: Sequence[float], objective: Objective
+) -> Tuple[List[int], List[int]]:
+    # 1) Glouton à cardinalité fixe : le joueur suivant (ELO décroissant) rejoint
+    #    l'équipe la plus faible qui a encore de la place.
+    team1_size = len(ratings) - len(ratings) // 2
+    team2_size = len(ratings) // 2
+    team1: List[int] = []
+    team2: List[int] = []
+    sum1 = sum2 = 0.0
+    for index in sorted(range(len(ratings)), key=lambda i: ratings[i], reverse=True):
+        if len(team2) >= team2_size or (len(team1) < team1_size and sum1 <= sum2):
+            team1.append(index)
+            sum1 += ratings[index]
+        else:
+            team2.append(index)
+            sum2 += ratings[index]
+
+    # 2) Recherche locale : on applique le meilleur échange 1-contre-1 tant
+    #    qu'il améliore l'objectif.
+    def score(t1: List[int], t2: List[int]) -> float:
+        return objective([ratings[i] for i in t1], [ratings[i] for i in t2])
+
+    current = score(team1, team2)
+    improved = True
+    while improved:
+        improved = False
+        best_swap = None
+        for a, b in itertools.product(range(len(team1)), range(len(team2))):
+            team1[a], team2[b] = team2[b], team1[a]
+            candidate = score(team1, team2)
+            team1[a], team2[b] = team2[b], team1[a]
+            if candidate < current - 1e-9:
+                current, best_swap = candidate, (a, b)
+        if best_swap:
+            a, b = best_swap
+            team1[a], team2[b] = team2[b], team1[a]
+            improved = True
+    return team1, team2
+
+
+def split_teams(
+    ratings: Sequence[float], objective: Union[str, Objective] = "average"
+) -> Tuple[List[int], List[int]]:
+    """Répartit des joueurs en deux équipes et retourne leurs indices.
+
+    Recherche exhaustive jusqu'à `EXHAUSTIVE_MAX_PLAYERS` joueurs, glouton +
+    recherche locale au-delà. Avec un nombre impair, l'équipe 1 a un joueur de plus.
+    """
+    objective_fn = _resolve_objective(objective)
+    if len(ratings) < 2:
+        return list(range(len(ratings))), []
+    if len(ratings) <= EXHAUSTIVE_MAX_PLAYERS:
+        return _exhaustive_split(ratings, objective_fn)
+    return _heuristic_split(ratings, objective_fn)
+
+
+def snake_split(ratings: Sequence[float]) -> Tuple[List[int], List[int]]:
+    """Ancienne répartition (alternance par ELO décroissant), gardée pour comparaison."""
+    ordered = sorted(range(len(ratings)), key=lambda i: ratings[i], reverse=True)
+    return ordered[::2], ordered[1::2]
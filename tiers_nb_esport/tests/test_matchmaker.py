@@ -0,0 +1,28 @@
+from tiers_nb_esport.elo_queue import QueueEntry
+from tiers_nb_esport.matchmaker import form_lobbies
+
+NOW = 10_000.0
+
+
+def _entry(discord_id: int, elo: int, wait: float) -> QueueEntry:
+    return QueueEntry(discord_id, elo, NOW - wait, discord_id)
+
+
+def test_overdue_players_are_not_skipped_for_a_fresh_one():
+    # 7 joueurs de 1000 à 1120 ELO ; seul le n°3 vient d'arriver, le n°6 attend depuis 900 s.
+    waits = [400, 400, 400, 10, 400, 400, 900]
+    entries = [_entry(i, 1000 + 20 * i, wait) for i, wait in enumerate(waits)]
+
+    lobbies = form_lobbies(entries, 6, max_spread=200, fairness_wait=300, now=NOW)
+
+    assert len(lobbies) == 1
+    assert sorted(lobbies[0].discord_ids) == [0, 1, 2, 4, 5, 6]
+
+
+def test_without_fairness_the_tightest_window_wins():
+    entries = [_entry(i, 1000 + 20 * i, 400) for i in range(7)]
+    entries[6] = _entry(6, 2000, 400)
+
+    lobbies = form_lobbies(entries, 6, fairness_wait=0, now=NOW)
+
+    assert [sorted(lobby.discord_ids) for lobby in lobbies] == [[0, 1, 2, 3, 4, 5]]
@@ -0,0 +1,31 @@
+import itertools
+import random
+
+import pytest
+
+from tiers_nb_esport.team_balance import OBJECTIVES, split_teams
+
+
+def _brute_force(ratings, objective):
+    everyone = range(len(ratings))
+    team1_size = len(ratings) - len(ratings) // 2
+    return min(
+        objective(
+            [ratings[i] for i in team1],
+            [ratings[i] for i in everyone if i not in team1],
+        )
+        for team1 in itertools.combinations(everyone, team1_size)
+    )
+
+
+@pytest.mark.parametrize("name", sorted(OBJECTIVES))
+@pytest.mark.parametrize("player_count", [3, 5, 7, 9, 11])
+def test_odd_split_matches_brute_force(name, player_count):
+    objective = OBJECTIVES[name]
+    rng = random.Random(player_count)
+    for _ in range(20):
+        ratings = [rng.randint(600, 1800) for _ in range(player_count)]
+        team1, team2 = split_teams(ratings, name)
+        assert len(team1) == len(team2) + 1
+        score = objective([ratings[i] for i in team1], [ratings[i] for i in team2])
+        assert score == pytest.approx(_brute_force(ratings, objective))
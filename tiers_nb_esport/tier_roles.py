@@ -0,0 +1,182 @@
+"""Synchronisation incrémentale des rôles Discord de tier (S à E)."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import discord
+
+from . import config
+from .rank_snapshot import RankSnapshot, TierChange
+
+logger = logging.getLogger(__name__)
+
+
+class TierRoleSync:
+    """Applique les changements de tier aux membres, à débit limité.
+
+    Un seul état en attente par joueur (le tier le plus récent gagne) et au
+    plus `max_pending` joueurs : au-delà, un changement issu d'un match est
+    compté comme abandonné et la réconciliation suivante le rattrape. Un
+    membre dont les rôles sont déjà corrects ne coûte aucune requête Discord.
+    Seuls les rôles de tier sont ajoutés ou retirés (`add_roles` /
+    `remove_roles`) : les autres rôles du membre ne sont jamais réécrits.
+    """
+
+    def __init__(self, role_ids: Dict[str, int], rate: float, max_pending: int):
+        self.role_ids = {tier: role_id for tier, role_id in role_ids.items() if role_id}
+        self._tier_role_ids = set(self.role_ids.values())
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.max_pending = max(1, int(max_pending))
+        self.guild: Optional[discord.Guild] = None
+        self._pending: "OrderedDict[int, Optional[str]]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.applied = 0
+        self.unchanged = 0
+        self.missing = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_config(cls) -> "TierRoleSync":
+        return cls(
+            config.TIER_ROLE_IDS,
+            rate=config.TIER_ROLE_SYNC_RATE,
+            max_pending=config.TIER_ROLE_SYNC_MAX_PENDING,
+        )
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self, guild: discord.Guild) -> None:
+        self.guild = guild
+        self._loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _put(self, discord_id: int, tier: Optional[str]) -> bool:
+        if discord_id not in self._pending and len(self._pending) >= self.max_pending:
+            return False
+        self._pending[discord_id] = tier
+        self._wakeup.set()
+        return True
+
+    def submit(self, changes: Iterable[TierChange]) -> None:
+        """À appeler depuis la boucle asyncio."""
+        for change in changes:
+            if not self._put(change.discord_id, change.new_tier):
+                self.dropped += 1
+
+    def submit_threadsafe(self, changes: List[TierChange]) -> None:
+        """Branché sur `RankSnapshot.on_tier_change`, appelé depuis un thread base de données."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self.submit, list(changes))
+
+    def role_changes(
+        self, member: discord.Member, tier: Optional[str]
+    ) -> Optional[Tuple[List[discord.Role], List[discord.Role]]]:
+        """Rôles de tier à ajouter et à retirer, None si ceux du membre sont déjà corrects."""
+        target = self.role_ids.get(tier) if tier else None
+        held = [role for role in member.roles if role.id in self._tier_role_ids]
+        if {role.id for role in held} == ({target} if target else set()):
+            return None
+        to_add: List[discord.Role] = []
+        if target and all(role.id != target for role in held):
+            role = member.guild.get_role(target)
+            if role is None:
+                return None
+            to_add.append(role)
+        to_remove = [role for role in held if role.id != target]
+        return to_add, to_remove
+
+    async def _apply(self, discord_id: int, tier: Optional[str]) -> bool:
+        member = self.guild.get_member(discord_id) if self.guild else None
+        if member is None:
+            self.missing += 1
+            return False
+        changes = self.role_changes(member, tier)
+        if changes is None:
+            self.unchanged += 1
+            return False
+        to_add, to_remove = changes
+        reason = f"Tier {tier or 'aucun'}"
+        if to_remove:
+            await member.remove_roles(*to_remove, reason=reason)
+        if to_add:
+            await member.add_roles(*to_add, reason=reason)
+        self.applied += 1
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            discord_id, tier = self._pending.popitem(last=False)
+            self._space.set()
+            try:
+                edited = await self._apply(discord_id, tier)
+            except Exception:
+                # Une erreur inattendue ne doit pas arrêter le worker pour de bon.
+                self.failed += 1
+                logger.exception("Rôle de tier non appliqué à %s", discord_id)
+                edited = True
+            if edited and self.interval:
+                await asyncio.sleep(self.interval)
+
+    async def _enqueue(self, discord_id: int, tier: Optional[str]) -> None:
+        # La réconciliation attend de la place au lieu d'abandonner.
+        while not self._put(discord_id, tier):
+            self._space.clear()
+            await self._space.wait()
+
+    async def reconcile(self, snapshot: RankSnapshot, chunk_size: int = 500) -> int:
+        """Compare rôles et tiers par tranches de classement ; retourne le nombre de membres à corriger."""
+        if self.guild is None or not snapshot.loaded:
+            return 0
+        queued = 0
+        ranked = snapshot.leaderboard
+        for start in range(1, len(ranked) + 1, chunk_size):
+            for player in ranked.slice(start, chunk_size):
+                member = self.guild.get_member(player.discord_id)
+                tier = snapshot.tier_of(player.discord_id)
+                if member is not None and self.role_changes(member, tier) is not None:
+                    await self._enqueue(player.discord_id, tier)
+                    queued += 1
+            await asyncio.sleep(0)
+        # Membres portant un rôle de tier sans être classés.
+        for role_id in self._tier_role_ids:
+            role = self.guild.get_role(role_id)
+            for member in list(role.members) if role else []:
+                if member.id not in ranked:
+                    await self._enqueue(member.id, None)
+                    queued += 1
+        return queued
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "applied": self.applied,
+            "unchanged": self.unchanged,
+            "missing": self.missing,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
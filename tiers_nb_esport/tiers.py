@@ -0,0 +1,60 @@
+"""Répartition des tiers (S à E) selon le rang au classement global."""
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from . import config
+
+
+def compute_tier_boundaries(total_players: int) -> List[Dict[str, int]]:
+    if total_players <= 0:
+        return []
+
+    remaining = total_players
+    boundaries: List[Dict[str, int]] = []
+
+    for index, distribution in enumerate(config.TIER_DISTRIBUTION):
+        if remaining <= 0:
+            break
+
+        ratio = float(distribution.get("ratio", 0) or 0)
+        min_count = int(distribution.get("minCount", 0) or 0)
+        future_min = sum(
+            int(next_dist.get("minCount", 0) or 0)
+            for next_dist in config.TIER_DISTRIBUTION[index + 1 :]
+        )
+
+        if index == len(config.TIER_DISTRIBUTION) - 1:
+            count = remaining
+        else:
+            count = int(total_players * ratio)
+            if count < min_count:
+                count = min_count
+            max_allowed = remaining - future_min
+            if max_allowed < 0:
+                max_allowed = 0
+            if count > max_allowed:
+                count = max(min_count, max_allowed)
+
+        if count > remaining:
+            count = remaining
+
+        if count <= 0:
+            continue
+
+        remaining -= count
+        boundaries.append({"tier": distribution["tier"], "end_rank": total_players - remaining})
+
+    return boundaries
+
+
+def get_tier_by_rank(rank: int, boundaries: List[Dict[str, int]]) -> Optional[str]:
+    if rank <= 0 or not boundaries:
+        return None
+
+    for boundary in boundaries:
+        end_rank = boundary.get("end_rank")
+        if isinstance(end_rank, int) and rank <= end_rank:
+            return boundary.get("tier")
+
+    return None
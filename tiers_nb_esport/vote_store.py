@@ -0,0 +1,98 @@
+"""État des votes des matchs en cours, compact et rechargeable depuis la base."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+
+@dataclass
+class MatchVoteState:
+    """Votes de la manche en cours d'un match (reconstruit depuis `matches` + `match_votes`).
+
+    Les décomptes par vote sont tenus à jour à chaque ajout : majorité et
+    résumé se lisent sans reparcourir les votes.
+    """
+
+    match_id: int
+    team1_ids: Tuple[int, ...]
+    team2_ids: Tuple[int, ...]
+    team1_score: int = 0
+    team2_score: int = 0
+    votes: Dict[int, str] = field(default_factory=dict)
+    closed: bool = False  # résultat décidé, finalisation en cours : plus aucun vote accepté
+    counts: Dict[str, int] = field(init=False, default_factory=dict)
+    voters: FrozenSet[int] = field(init=False)
+    majority: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.voters = frozenset(self.team1_ids + self.team2_ids)
+        total = len(self.voters)
+        if total < 2:
+            total = max(len(self.team1_ids) + len(self.team2_ids), 2)
+        self.majority = total // 2 + 1
+        for label in self.votes.values():
+            self.counts[label] = self.counts.get(label, 0) + 1
+
+    @classmethod
+    def from_rows(cls, match: Dict, votes: Iterable[Tuple[int, str]] = ()) -> "MatchVoteState":
+        return cls(
+            match_id=int(match["id"]),
+            team1_ids=tuple(int(pid) for pid in match["team1_ids"]),
+            team2_ids=tuple(int(pid) for pid in match["team2_ids"]),
+            team1_score=int(match.get("team1_score") or 0),
+            team2_score=int(match.get("team2_score") or 0),
+            votes={int(voter): label for voter, label in votes},
+        )
+
+    def add_vote(self, voter_id: int, label: str) -> Optional[str]:
+        """Ajoute un vote ; retourne `label` s'il vient d'atteindre la majorité.
+
+        Seul le vote ajouté peut faire basculer la manche : inutile de
+        comparer les autres décomptes. Les votes suivants pour le même
+        résultat ne le redéclenchent pas.
+        """
+        self.votes[voter_id] = label
+        count = self.counts.get(label, 0) + 1
+        self.counts[label] = count
+        return label if count == self.majority else None
+
+    def clear_votes(self) -> None:
+        self.votes.clear()
+        self.counts.clear()
+
+
+class VoteStore:
+    """Un `MatchVoteState` par match ayant reçu un vote depuis le démarrage.
+
+    Les boutons de vote ne portent que `match:<id>:<vote>` : aucune View
+    n'est gardée en mémoire par match. L'état manquant (redémarrage, premier
+    vote) est rechargé depuis la base, qui reste la référence.
+
+    Les votes d'un match sont sérialisés par un verrou choisi parmi
+    `stripes` selon l'id du match (y compris le rechargement) : deux matchs
+    ne se bloquent que s'ils tombent sur le même verrou.
+    """
+
+    def __init__(self, stripes: int = 64) -> None:
+        self._matches: Dict[int, MatchVoteState] = {}
+        self._locks = [asyncio.Lock() for _ in range(max(1, int(stripes)))]
+
+    def __len__(self) -> int:
+        return len(self._matches)
+
+    def __contains__(self, match_id: object) -> bool:
+        return match_id in self._matches
+
+    def lock(self, match_id: int) -> asyncio.Lock:
+        return self._locks[match_id % len(self._locks)]
+
+    def get(self, match_id: int) -> Optional[MatchVoteState]:
+        return self._matches.get(match_id)
+
+    def put(self, state: MatchVoteState) -> MatchVoteState:
+        self._matches[state.match_id] = state
+        return state
+
+    def discard(self, match_id: int) -> None:
+        self._matches.pop(match_id, None)